@@ -0,0 +1,98 @@
+"""Compare JSON serialization time and bytes on the wire for /schemes payloads.
+
+Usage (from Government_Schemes_Extraction_APIs/):
+    python benchmarks/bench_serialization.py [--sizes 1000 10000 100000] [--repeat 5] [--json]
+
+The "fastapi" path is what a plain dict return goes through: jsonable_encoder
+followed by JSONResponse.render. The "orjson" path is FastJSONResponse, which
+routes use for already-plain Mongo documents.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from compression import _Compressor, brotli
+from serialization import FastJSONResponse
+
+MINISTRIES = [
+    "Ministry of Electronics and IT",
+    "Ministry of MSME",
+    "Department for Promotion of Industry and Internal Trade",
+    "Ministry of Education",
+    "Department of Science and Technology",
+]
+WORDS = "startup grant seed fund incubation women founders rural innovation credit subsidy export technology".split()
+
+
+def make_catalogue(size: int, seed: int = 42) -> dict:
+    rng = random.Random(seed)
+    schemes = []
+    for i in range(size):
+        schemes.append({
+            "scheme_name": f"Scheme {i:06d} {rng.choice(WORDS).title()}",
+            "description": " ".join(rng.choices(WORDS, k=60)),
+            "ministry": rng.choice(MINISTRIES),
+            "benefits": [" ".join(rng.choices(WORDS, k=6)) for _ in range(rng.randint(1, 5))],
+        })
+    return {"schemes": schemes, "next_after": None}
+
+
+def best_time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def compressed_size(body: bytes, encoding: str) -> int:
+    return len(_Compressor(encoding, gzip_level=6, brotli_quality=5).compress(body, final=True))
+
+
+def run(sizes: list[int], repeat: int) -> list[dict]:
+    rows = []
+    for size in sizes:
+        content = make_catalogue(size)
+        default_seconds = best_time(lambda: JSONResponse(jsonable_encoder(content)), repeat)
+        orjson_seconds = best_time(lambda: FastJSONResponse(content), repeat)
+        body = FastJSONResponse(content).body
+        rows.append({
+            "schemes": size,
+            "fastapi_ms": round(default_seconds * 1000, 2),
+            "orjson_ms": round(orjson_seconds * 1000, 2),
+            "speedup": round(default_seconds / orjson_seconds, 1),
+            "raw_bytes": len(body),
+            "gzip_bytes": compressed_size(body, "gzip"),
+            "br_bytes": compressed_size(body, "br") if brotli is not None else None,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    rows = run(args.sizes, args.repeat)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    columns = list(rows[0])
+    print(" ".join(f"{column:>12}" for column in columns))
+    for row in rows:
+        print(" ".join(f"{str(row[column]):>12}" for column in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""Drive mixed read/write traffic at the /schemes routes and report latency.
+
+Usage (from Government_Schemes_Extraction_APIs/):
+    # In-process app on mongomock (pip install -r requirements-dev.txt)
+    python benchmarks/load_test.py --schemes 10000 --concurrency 50 --duration 30
+
+    # In-process app on a local mongod
+    python benchmarks/load_test.py --mongo-uri mongodb://localhost:27017
+
+    # An already running server (e.g. several uvicorn workers)
+    python benchmarks/load_test.py --base-url http://localhost:10000 --no-seed
+
+Prints one JSON document with throughput and p50/p95/p99 latency per route
+template; --output also writes it to a file so runs can be compared.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from bench_serialization import MINISTRIES, WORDS
+
+# Relative frequency of each operation in the traffic mix
+DEFAULT_MIX = {
+    "list": 30,
+    "get": 35,
+    "stream": 2,
+    "search": 10,
+    "recommend": 8,
+    "create": 5,
+    "update": 5,
+    "delete": 3,
+    "bulk": 2,
+}
+
+
+def make_scheme(rng: random.Random, name: str) -> dict:
+    return {
+        "scheme_name": name,
+        "description": " ".join(rng.choices(WORDS, k=40)),
+        "ministry": rng.choice(MINISTRIES),
+        "benefits": [" ".join(rng.choices(WORDS, k=5)) for _ in range(rng.randint(1, 4))],
+    }
+
+
+# mongomock has no $text support, so search is off unless asked for
+MONGOMOCK_MIX = {**DEFAULT_MIX, "search": 0}
+
+
+def parse_mix(values: list[str] | None, defaults: dict = DEFAULT_MIX) -> dict:
+    mix = dict(defaults)
+    for value in values or []:
+        name, _, weight = value.partition("=")
+        if name not in DEFAULT_MIX:
+            raise SystemExit(f"Unknown operation in --mix: {name}")
+        mix[name] = int(weight)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class LoadGenerator:
+    def __init__(self, client: httpx.AsyncClient, names: list[str], mix: dict, seed: int):
+        self.client = client
+        self.names = names
+        self.created: list[str] = []
+        self.mix = mix
+        self.rng = random.Random(seed)
+        self.samples: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+
+    async def _request(self, route: str, method: str, url: str, **kwargs) -> None:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            # Drain streamed bodies so the timing covers the whole response
+            await response.aread()
+            failed = response.status_code >= 500
+        except httpx.HTTPError:
+            failed = True
+        self.samples.setdefault(route, []).append(time.perf_counter() - started)
+        if failed:
+            self.errors[route] = self.errors.get(route, 0) + 1
+
+    async def run_one(self) -> None:
+        operation = self.rng.choices(list(self.mix), weights=list(self.mix.values()))[0]
+        rng = self.rng
+        if operation == "list":
+            await self._request("GET /schemes", "GET", "/schemes", params={"limit": 100})
+        elif operation == "stream":
+            await self._request("GET /schemes?format=ndjson", "GET", "/schemes",
+                                params={"format": "ndjson", "limit": 1000})
+        elif operation == "get":
+            await self._request("GET /schemes/{scheme_name}", "GET", f"/schemes/{rng.choice(self.names)}")
+        elif operation == "search":
+            await self._request("GET /schemes/search", "GET", "/schemes/search",
+                                params={"q": " ".join(rng.choices(WORDS, k=2)), "ministry": rng.choice(MINISTRIES)})
+        elif operation == "recommend":
+            profile = {"industry": rng.choice(WORDS), "stage": "seed", "location": "Karnataka",
+                       "team_size": rng.randint(1, 200)}
+            await self._request("POST /schemes/recommend", "POST", "/schemes/recommend", json=profile)
+        elif operation == "create":
+            name = f"load-{uuid.uuid4().hex[:12]}"
+            self.created.append(name)
+            await self._request("POST /schemes", "POST", "/schemes", json=make_scheme(rng, name))
+        elif operation == "update":
+            name = rng.choice(self.names)
+            await self._request("PUT /schemes/{scheme_name}", "PUT", f"/schemes/{name}", json=make_scheme(rng, name))
+        elif operation == "delete":
+            if not self.created:
+                return
+            name = self.created.pop()
+            await self._request("DELETE /schemes/{scheme_name}", "DELETE", f"/schemes/{name}")
+        elif operation == "bulk":
+            batch = [make_scheme(rng, rng.choice(self.names)) for _ in range(50)]
+            await self._request("POST /schemes/bulk", "POST", "/schemes/bulk", json=batch,
+                                params={"ordered": "false"})
+
+    async def run(self, concurrency: int, duration: float) -> float:
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                await self.run_one()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - started
+
+    def report(self, elapsed: float) -> dict:
+        routes = {}
+        for route, samples in sorted(self.samples.items()):
+            samples.sort()
+            routes[route] = {
+                "requests": len(samples),
+                "errors": self.errors.get(route, 0),
+                "throughput_rps": round(len(samples) / elapsed, 1),
+                "p50_ms": round(percentile(samples, 0.50) * 1000, 2),
+                "p95_ms": round(percentile(samples, 0.95) * 1000, 2),
+                "p99_ms": round(percentile(samples, 0.99) * 1000, 2),
+                "max_ms": round(samples[-1] * 1000, 2),
+            }
+        total = sum(route["requests"] for route in routes.values())
+        return {
+            "elapsed_seconds": round(elapsed, 2),
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "throughput_rps": round(total / elapsed, 1),
+            "routes": routes,
+        }
+
+
+async def open_in_process_app(mongo_uri: str | None):
+    """Return (app, repo, cleanup) for the schemes app on mongod or mongomock"""
+    import main
+    from repository import SchemeRepository
+
+    if mongo_uri:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        mongo = AsyncIOMotorClient(mongo_uri)
+        collection = mongo["schemes_load_test"]["schemes"]
+        await collection.drop()
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        mongo = AsyncMongoMockClient()
+        collection = mongo["schemes_load_test"]["schemes"]
+
+    repo = SchemeRepository(collection)
+    await repo.ensure_indexes()
+    main.app.dependency_overrides[main.get_repo] = lambda: repo
+
+    async def cleanup():
+        main.app.dependency_overrides.pop(main.get_repo, None)
+        if mongo_uri:
+            await collection.drop()
+            mongo.close()
+
+    return main, repo, cleanup
+
+
+async def run(args) -> dict:
+    rng = random.Random(args.seed)
+    names = [f"Scheme {i:07d}" for i in range(args.schemes)]
+    cleanup = None
+    mix = parse_mix(args.mix, DEFAULT_MIX if args.base_url or args.mongo_uri else MONGOMOCK_MIX)
+
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout)
+        if not args.no_seed:
+            for start in range(0, len(names), 1000):
+                batch = [make_scheme(rng, name) for name in names[start:start + 1000]]
+                (await client.post("/schemes/bulk", json=batch, params={"ordered": "false"})).raise_for_status()
+    else:
+        main, repo, cleanup = await open_in_process_app(args.mongo_uri)
+        for start in range(0, len(names), 1000):
+            batch = [make_scheme(rng, name) for name in names[start:start + 1000]]
+            await repo.collection.insert_many(batch)
+        main.recommender.__init__(main.recommender.n_features)
+        main.eligibility_index.__init__()
+        await main._load_indexes(repo)
+        # Report app exceptions as 500s instead of raising them here
+        transport = httpx.ASGITransport(app=main.app, raise_app_exceptions=False)
+        client = httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=args.timeout)
+
+    try:
+        generator = LoadGenerator(client, names, mix, args.seed)
+        elapsed = await generator.run(args.concurrency, args.duration)
+    finally:
+        await client.aclose()
+        if cleanup:
+            await cleanup()
+
+    report = generator.report(elapsed)
+    report["config"] = {
+        "target": args.base_url or ("mongod" if args.mongo_uri else "mongomock"),
+        "schemes": args.schemes,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "mix": mix,
+        "seed": args.seed,
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--schemes", type=int, default=10_000, help="catalogue size to seed")
+    parser.add_argument("--concurrency", type=int, default=50, help="concurrent virtual clients")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of traffic")
+    parser.add_argument("--mix", nargs="*", metavar="OP=WEIGHT",
+                        help=f"override operation weights, e.g. bulk=0 (default {DEFAULT_MIX})")
+    parser.add_argument("--mongo-uri", help="run the app in-process against this mongod instead of mongomock")
+    parser.add_argument("--base-url", help="load an already running server instead of an in-process app")
+    parser.add_argument("--no-seed", action="store_true", help="with --base-url, skip seeding the catalogue")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Measure how request throughput scales with the number of gunicorn workers.
+
+Usage (from Government_Schemes_Extraction_APIs/, with MONGO_URI, DB_NAME and
+COLLECTION_NAME pointing at a scratch database on a replica set, e.g. a
+local `mongod --replSet rs0` after `rs.initiate()`):
+    python benchmarks/scale_workers.py --workers 1 2 4 --duration 30
+
+For each worker count this starts `gunicorn main:app -c gunicorn.conf.py`
+with SCHEME_CHANGE_STREAM=1, as gunicorn.conf.py otherwise runs one worker,
+waits for /readyz, drives it with load_test.py --base-url and stops it with
+SIGTERM. The catalogue is seeded on the first run only. Prints a table of
+throughput, p95/p99 latency and speed-up over the first run, headed by the
+host's CPU count and MongoDB version so the table can be recorded as is
+(see gunicorn.conf.py). --output-dir also keeps each run's full
+load_test report.
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+from pymongo import MongoClient
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOAD_TEST = os.path.join(APP_DIR, "benchmarks", "load_test.py")
+
+
+def wait_ready(base_url: str, server: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with status {server.returncode}")
+        try:
+            if httpx.get(f"{base_url}/readyz", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"{base_url} was not ready after {timeout:g}s")
+
+
+def replica_set_info(mongo_uri: str) -> str:
+    """Describe the deployment, refusing standalone servers (no change streams)"""
+    client = MongoClient(mongo_uri, serverSelectionTimeoutMS=10_000)
+    try:
+        hello = client.admin.command("hello")
+        version = client.server_info()["version"]
+    finally:
+        client.close()
+    if "setName" not in hello:
+        raise SystemExit("MONGO_URI must point at a replica set: workers share writes through the change stream")
+    return f"MongoDB {version}, replica set {hello['setName']}"
+
+
+def run_once(workers: int, args, seed_catalogue: bool, output_path: str) -> dict:
+    base_url = f"http://127.0.0.1:{args.port}"
+    env = {**os.environ, "PORT": str(args.port), "WEB_CONCURRENCY": str(workers), "SCHEME_CHANGE_STREAM": "1"}
+    server = subprocess.Popen(["gunicorn", "main:app", "-c", "gunicorn.conf.py"], cwd=APP_DIR, env=env)
+    try:
+        wait_ready(base_url, server)
+        command = [
+            sys.executable, LOAD_TEST, "--base-url", base_url,
+            "--schemes", str(args.schemes), "--concurrency", str(args.concurrency),
+            "--duration", str(args.duration), "--output", output_path,
+        ]
+        if not seed_catalogue:
+            command.append("--no-seed")
+        if args.mix:
+            command += ["--mix", *args.mix]
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+    with open(output_path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--schemes", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=100, help="concurrent virtual clients per run")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of traffic per run")
+    parser.add_argument("--mix", nargs="*", metavar="OP=WEIGHT", help="passed through to load_test.py")
+    parser.add_argument("--port", type=int, default=10100)
+    parser.add_argument("--output-dir", help="keep each run's load_test report here")
+    args = parser.parse_args()
+
+    deployment = replica_set_info(os.environ["MONGO_URI"])
+    output_dir = args.output_dir or tempfile.mkdtemp(prefix="scale-workers-")
+    os.makedirs(output_dir, exist_ok=True)
+    rows = []
+    for index, workers in enumerate(args.workers):
+        report = run_once(workers, args, index == 0, os.path.join(output_dir, f"workers-{workers}.json"))
+        # Overall p95/p99 aren't in the report, so show the busiest route's
+        busiest = max(report["routes"].values(), key=lambda route: route["requests"])
+        rows.append((workers, report["throughput_rps"], report["errors"], busiest["p95_ms"], busiest["p99_ms"]))
+
+    baseline = rows[0][1] or None
+    print(f"{os.cpu_count()} CPUs, {deployment}, {args.concurrency} clients, {args.duration:g}s per run")
+    print(f"{'workers':>7} {'req/s':>9} {'errors':>6} {'p95 ms':>8} {'p99 ms':>8} {'speed-up':>8}")
+    for workers, rps, errors, p95, p99 in rows:
+        speedup = f"{rps / baseline:.2f}x" if baseline else "-"
+        print(f"{workers:>7} {rps:>9.1f} {errors:>6} {p95:>8.2f} {p99:>8.2f} {speedup:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""In-process caching helpers for scheme reads."""
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries also expire `ttl` seconds after being set.
+
+    Every invalidation bumps `generation`. A reader takes the generation
+    before querying Mongo and passes it to `set`, and the value is dropped
+    if a write invalidated the cache while the query was in flight.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key, _MISSING)
+        if entry is not _MISSING:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return default
+
+    def set(self, key, value, generation: int | None = None) -> None:
+        if self.maxsize <= 0 or (generation is not None and generation != self.generation):
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, *keys) -> None:
+        self.generation += 1
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+class SingleFlight:
+    """Coalesces concurrent identical lookups into one in-flight call.
+
+    The first caller for a key starts the call as a task; callers arriving
+    before it finishes await the same task instead of issuing their own.
+    The task is shielded, so a leader whose client disconnects doesn't
+    cancel the lookup for everyone else.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight: dict = {}
+
+    async def do(self, key, fn):
+        task = self._in_flight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finished(self, key, task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the error retrieved even if every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._in_flight)}
+
+
+class CatalogVersion:
+    """Version stamp for the whole catalogue, bumped on every write.
+
+    Backs the ETag and Last-Modified headers on read routes, so a client
+    revalidating an unchanged catalogue can be answered without touching
+    Mongo. Only this process's write handlers bump the stamp, so it also
+    expires `max_age` seconds after it was minted, like the TTL caches: a
+    write made anywhere else (another worker, the scraper CLI, any other
+    Mongo client) stops being answered with 304 within that bound. Each
+    process has its own boot id, so a client moving between workers gets a
+    full response.
+    """
+
+    def __init__(self, max_age: float = 60.0):
+        self.max_age = max_age
+        self.new_boot_id()
+        self.counter = 0
+        self.last_modified = time.time()
+        self._minted = time.monotonic()
+
+    def new_boot_id(self) -> None:
+        """Start a fresh tag space, e.g. in a worker forked from a preloaded master"""
+        self._boot_id = uuid.uuid4().hex[:12]
+
+    def bump(self) -> None:
+        self.counter += 1
+        self.last_modified = time.time()
+        self._minted = time.monotonic()
+
+    def _expire(self) -> None:
+        if self.max_age > 0 and time.monotonic() - self._minted >= self.max_age:
+            self.bump()
+
+    @property
+    def etag(self) -> str:
+        return f'W/"{self._boot_id}-{self.counter}"'
+
+    def headers(self) -> dict:
+        self._expire()
+        return {"ETag": self.etag, "Last-Modified": formatdate(self.last_modified, usegmt=True)}
+
+    def matches(self, if_none_match: str | None, if_modified_since: str | None) -> bool:
+        """True if the client's cached copy is still current"""
+        self._expire()
+        if if_none_match is not None:
+            # Weak comparison, as RFC 9110 requires for If-None-Match
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return "*" in tags or self.etag.removeprefix("W/") in tags
+        if if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(self.last_modified) <= since
+        return False
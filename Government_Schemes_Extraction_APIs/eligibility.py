@@ -0,0 +1,200 @@
+"""Structured scheme eligibility rules, evaluated for many profiles at once."""
+import datetime
+import threading
+
+import numpy as np
+
+# Rule fields that restrict a profile attribute to a list of allowed values
+CATEGORICAL_FIELDS = ("sectors", "stages", "states")
+# Profile attribute each categorical rule field checks
+PROFILE_ATTRIBUTES = {"sectors": "sector", "stages": "stage", "states": "state"}
+
+DAYS_PER_YEAR = 365.25
+
+
+def normalize(value: str) -> str:
+    return " ".join(value.lower().split())
+
+
+class EligibilityIndex:
+    """Compiles every scheme's eligibility_criteria into NumPy arrays.
+
+    Each categorical rule is a boolean (value x scheme) table plus an
+    "unrestricted" flag per scheme, and each numeric rule is a bound per
+    scheme (+/-inf when absent). Evaluating a block of profiles is then a
+    handful of broadcast comparisons over the whole catalogue instead of a
+    Python loop per (profile, scheme) pair. Rows are updated in place as
+    schemes are written, like SchemeRecommender's matrix.
+
+    A profile that leaves an attribute out only matches schemes that don't
+    restrict it.
+
+    evaluate() may run in a worker thread while the event loop writes: it
+    copies the rules under a lock first and evaluates that copy.
+    """
+
+    def __init__(self, initial_capacity: int = 1024, initial_values: int = 64):
+        self._lock = threading.Lock()
+        self._names: list[str | None] = []
+        self._rows: dict[str, int] = {}
+        self._free_rows: list[int] = []
+        self._alive = np.zeros(initial_capacity, dtype=bool)
+        # Value code 0 stands for "missing or never seen" and is never allowed
+        self._codes = {field: {} for field in CATEGORICAL_FIELDS}
+        self._allowed = {
+            field: np.zeros((initial_values, initial_capacity), dtype=bool) for field in CATEGORICAL_FIELDS
+        }
+        self._unrestricted = {field: np.ones(initial_capacity, dtype=bool) for field in CATEGORICAL_FIELDS}
+        self._max_turnover = np.full(initial_capacity, np.inf)
+        self._min_age_days = np.full(initial_capacity, -np.inf)
+        self._max_age_days = np.full(initial_capacity, np.inf)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def upsert(self, scheme: dict) -> None:
+        with self._lock:
+            self._upsert(scheme)
+
+    def _upsert(self, scheme: dict) -> None:
+        name = scheme["scheme_name"]
+        row = self._rows.get(name)
+        if row is None:
+            row = self._allocate_row()
+            self._rows[name] = row
+            self._names[row] = name
+        self._clear_row(row)
+        self._alive[row] = True
+
+        criteria = scheme.get("eligibility_criteria") or {}
+        for field in CATEGORICAL_FIELDS:
+            values = criteria.get(field)
+            if values:
+                self._unrestricted[field][row] = False
+                for value in values:
+                    # _code may grow the table, so look it up afterwards
+                    code = self._code(field, value)
+                    self._allowed[field][code, row] = True
+        if criteria.get("max_turnover") is not None:
+            self._max_turnover[row] = criteria["max_turnover"]
+        if criteria.get("min_age_years") is not None:
+            self._min_age_days[row] = criteria["min_age_years"] * DAYS_PER_YEAR
+        if criteria.get("max_age_years") is not None:
+            self._max_age_days[row] = criteria["max_age_years"] * DAYS_PER_YEAR
+
+    def remove(self, scheme_name: str) -> None:
+        with self._lock:
+            self._remove(scheme_name)
+
+    def _remove(self, scheme_name: str) -> None:
+        row = self._rows.pop(scheme_name, None)
+        if row is None:
+            return
+        self._clear_row(row)
+        self._alive[row] = False
+        self._names[row] = None
+        self._free_rows.append(row)
+
+    def _clear_row(self, row: int) -> None:
+        for field in CATEGORICAL_FIELDS:
+            self._allowed[field][:, row] = False
+            self._unrestricted[field][row] = True
+        self._max_turnover[row] = np.inf
+        self._min_age_days[row] = -np.inf
+        self._max_age_days[row] = np.inf
+
+    def _code(self, field: str, value: str) -> int:
+        codes = self._codes[field]
+        key = normalize(value)
+        code = codes.get(key)
+        if code is None:
+            code = codes[key] = len(codes) + 1
+            table = self._allowed[field]
+            if code == len(table):
+                grown = np.zeros((len(table) * 2, table.shape[1]), dtype=bool)
+                grown[: len(table)] = table
+                self._allowed[field] = grown
+        return code
+
+    def _allocate_row(self) -> int:
+        if self._free_rows:
+            return self._free_rows.pop()
+        row = len(self._names)
+        if row == len(self._alive):
+            # Grow geometrically so appends stay amortised O(1)
+            capacity = len(self._alive) * 2
+            self._alive = _grown(self._alive, capacity, False)
+            self._max_turnover = _grown(self._max_turnover, capacity, np.inf)
+            self._min_age_days = _grown(self._min_age_days, capacity, -np.inf)
+            self._max_age_days = _grown(self._max_age_days, capacity, np.inf)
+            for field in CATEGORICAL_FIELDS:
+                self._unrestricted[field] = _grown(self._unrestricted[field], capacity, True)
+                table = self._allowed[field]
+                grown = np.zeros((len(table), capacity), dtype=bool)
+                grown[:, :row] = table
+                self._allowed[field] = grown
+        self._names.append(None)
+        return row
+
+    def evaluate(self, profiles: list[dict], block_size: int = 1024, today: datetime.date | None = None):
+        """Yield the eligible scheme names for each profile, in order.
+
+        Profiles are dicts with optional sector, stage, state, turnover and
+        incorporation_date (a date) keys. They are evaluated block_size at a
+        time to bound the size of the (profile x scheme) boolean matrix.
+        """
+        with self._lock:
+            used = len(self._names)
+            names = np.array(self._names, dtype=object)
+            alive = self._alive[:used].copy()
+            codes = {field: dict(self._codes[field]) for field in CATEGORICAL_FIELDS}
+            allowed = {field: self._allowed[field][:, :used].copy() for field in CATEGORICAL_FIELDS}
+            unrestricted = {field: self._unrestricted[field][:used].copy() for field in CATEGORICAL_FIELDS}
+            max_turnover = self._max_turnover[:used].copy()
+            min_age_days = self._min_age_days[:used].copy()
+            max_age_days = self._max_age_days[:used].copy()
+        today = np.datetime64(today or datetime.date.today(), "D")
+        for start in range(0, len(profiles), block_size):
+            block = profiles[start:start + block_size]
+            eligible = np.repeat(alive[None, :], len(block), axis=0)
+            for field in CATEGORICAL_FIELDS:
+                values = [profile.get(PROFILE_ATTRIBUTES[field]) for profile in block]
+                eligible &= unrestricted[field][None, :] | allowed[field][_lookup(codes[field], values)]
+
+            turnover = _column(block, "turnover")
+            eligible &= _at_most(turnover, max_turnover)
+
+            incorporated = np.array(
+                [profile.get("incorporation_date") or "NaT" for profile in block], dtype="datetime64[D]"
+            )
+            age_days = (today - incorporated).astype(np.float64)
+            age_days[np.isnat(incorporated)] = np.nan
+            eligible &= _at_most(age_days, max_age_days)
+            eligible &= _at_least(age_days, min_age_days)
+
+            for row in eligible:
+                yield names[row.nonzero()[0]].tolist()
+
+
+def _lookup(codes: dict[str, int], values: list[str | None]) -> np.ndarray:
+    return np.array([codes.get(normalize(value), 0) if value else 0 for value in values], dtype=np.intp)
+
+
+def _grown(array: np.ndarray, capacity: int, fill) -> np.ndarray:
+    grown = np.full(capacity, fill, dtype=array.dtype)
+    grown[: len(array)] = array
+    return grown
+
+
+def _column(profiles: list[dict], key: str) -> np.ndarray:
+    return np.array([np.nan if profile.get(key) is None else profile[key] for profile in profiles], dtype=np.float64)
+
+
+# Bounds of +/-inf mean "no limit" and pass even when the profile value is
+# missing (NaN); any real bound fails a missing value, as NaN compares False
+def _at_most(values: np.ndarray, bounds: np.ndarray) -> np.ndarray:
+    return np.isposinf(bounds)[None, :] | (values[:, None] <= bounds[None, :])
+
+
+def _at_least(values: np.ndarray, bounds: np.ndarray) -> np.ndarray:
+    return np.isneginf(bounds)[None, :] | (values[:, None] >= bounds[None, :])
@@ -0,0 +1,101 @@
+"""In-process fan-out of scheme change events for the SSE feed."""
+import asyncio
+import uuid
+from collections import deque
+
+from metrics import REGISTRY, Gauge
+from serialization import dumps
+
+# Set from EventBroker.subscriber_count when /metrics is scraped
+SSE_SUBSCRIBERS = REGISTRY.register(Gauge(
+    "sse_subscribers", "Open /schemes/events streams in this worker."))
+
+
+class _Subscriber:
+    def __init__(self, maxsize: int):
+        self.queue = asyncio.Queue(maxsize)
+
+
+class EventBroker:
+    """Publishes scheme change events to SSE subscribers.
+
+    Event ids are "<boot id>-<sequence>". The last `history` events are kept
+    so a reconnecting client can send Last-Event-ID and replay what it
+    missed. Ids from another process or ones already out of the buffer get
+    a "reset" event, telling the client to refetch the catalogue. A
+    subscriber that falls `queue_size` events behind is handled the same
+    way and disconnected.
+    """
+
+    def __init__(self, history: int = 1000, queue_size: int = 1000):
+        self.new_boot_id()
+        self._sequence = 0
+        self._history = deque(maxlen=history)
+        self._queue_size = queue_size
+        self._subscribers: set[_Subscriber] = set()
+
+    def new_boot_id(self) -> None:
+        """Start a fresh id space, e.g. in a worker forked from a preloaded master"""
+        self._boot_id = uuid.uuid4().hex[:8]
+
+    def publish(self, event_type: str, scheme_name: str | None, **data) -> None:
+        self._sequence += 1
+        event = {
+            "id": f"{self._boot_id}-{self._sequence}",
+            "sequence": self._sequence,
+            "event": event_type,
+            "data": {"scheme_name": scheme_name, **data},
+        }
+        self._history.append(event)
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._evict(subscriber)
+
+    def _evict(self, subscriber: _Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(None)
+
+    def subscribe(self, last_event_id: str | None) -> tuple[_Subscriber, list[dict], bool]:
+        """Register a subscriber; returns it, the events to replay and whether to reset"""
+        subscriber = _Subscriber(self._queue_size)
+        self._subscribers.add(subscriber)
+        if not last_event_id:
+            return subscriber, [], False
+
+        boot_id, _, sequence = last_event_id.partition("-")
+        if boot_id != self._boot_id or not sequence.isdigit():
+            return subscriber, [], True
+        sequence = int(sequence)
+        oldest = self._history[0]["sequence"] if self._history else self._sequence + 1
+        if sequence + 1 < oldest:
+            return subscriber, [], True
+        return subscriber, [event for event in self._history if event["sequence"] > sequence], False
+
+    def reset(self) -> None:
+        """Forget history and reset every subscriber, e.g. after missing changes"""
+        self._history.clear()
+        self.close()
+
+    def close(self) -> None:
+        """End every open stream, e.g. when the server starts draining"""
+        for subscriber in list(self._subscribers):
+            self._evict(subscriber)
+
+    def unsubscribe(self, subscriber: _Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+
+def format_sse(event: dict) -> bytes:
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: ".encode() + dumps(event["data"]) + b"\n\n"
+
+
+def format_reset() -> bytes:
+    return b"event: reset\ndata: {}\n\n"
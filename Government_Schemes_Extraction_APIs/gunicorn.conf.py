@@ -0,0 +1,57 @@
+"""Gunicorn settings for running the API in production.
+
+    gunicorn main:app -c gunicorn.conf.py
+
+Each worker is a uvicorn event loop in its own process, so N workers use N
+cores. main is imported once in the master (preload_app) and the workers
+fork with the code already loaded. The Motor client, the recommender and
+eligibility indexes, the change-stream watcher and the other background
+tasks are all created in the app's lifespan, so each worker gets its own
+after the fork. Scraping and history compaction run in one worker per host.
+
+Workers only see each other's writes through the change stream: without
+it a worker's caches, catalogue ETag and /schemes/events would miss every
+write another worker handled. So more than one worker is started only
+with SCHEME_CHANGE_STREAM=1, which needs a replica set. Even then
+/metrics and the rate limiter stay per worker. A scrape reports whichever
+worker answered it, so counters can appear to go backwards between
+scrapes.
+
+On SIGTERM (a redeploy, say) the master stops accepting connections and
+gives workers graceful_timeout seconds to finish in-flight requests. Open
+SSE streams are ended right away, so their clients reconnect elsewhere.
+
+To measure how throughput scales with the worker count (needs MONGO_URI
+pointing at a replica set):
+    python benchmarks/scale_workers.py --workers 1 2 4
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '10000')}"
+# WEB_CONCURRENCY is the conventional knob on Render/Heroku; default one per
+# core, but a single worker unless the change stream keeps them in step
+change_stream = os.getenv("SCHEME_CHANGE_STREAM", "0") == "1"
+requested_workers = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+workers = requested_workers if change_stream else 1
+worker_class = "workers.SchemesWorker"
+preload_app = True
+
+# Seconds a worker gets to drain after SIGTERM before it is killed
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+# A worker whose event loop is blocked this long is restarted
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+keepalive = 5
+# Optionally recycle workers every N requests, staggered so they don't all restart together
+max_requests = int(os.getenv("MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+
+# Proxies whose X-Forwarded-For/-Proto are trusted ("*" behind Render's proxy)
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+accesslog = "-"
+
+
+def on_starting(server):
+    if workers < requested_workers:
+        server.log.warning(
+            "Running 1 worker instead of %d: set SCHEME_CHANGE_STREAM=1 (needs a replica set) "
+            "to keep several in step", requested_workers)
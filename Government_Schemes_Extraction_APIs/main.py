@@ -1,23 +1,401 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from pymongo import MongoClient
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from starlette.concurrency import run_in_threadpool
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import ConnectionFailure, DuplicateKeyError, PyMongoError
+from bson import ObjectId
+from bson.errors import InvalidId
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+import orjson
+import logging
 import os
+import signal
+import tempfile
+import threading
+import time
 from dotenv import load_dotenv
 
+try:
+    import fcntl
+except ImportError:  # Windows: no host-wide locks, every process runs the jobs
+    fcntl = None
+
+from cache import CatalogVersion, SingleFlight, TTLCache
+from compression import CompressionMiddleware
+from eligibility import EligibilityIndex
+from events import SSE_SUBSCRIBERS, EventBroker, format_reset, format_sse
+from metrics import REGISTRY, MetricsMiddleware, MongoCommandMetrics, PoolMonitor
+from ratelimit import RateLimitMiddleware, TokenBucketLimiter
+from recommender import SchemeRecommender
+from scraper import SchemeService, load_portals
+from repository import SchemeRepository, repository_from_env
+from serialization import FastJSONResponse, dumps, dumps_line
+
 # Load environment variables
 load_dotenv()
 
-# Connect to MongoDB
+# MongoDB settings
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = os.getenv("DB_NAME")
 COLLECTION_NAME = os.getenv("COLLECTION_NAME")
 
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
-collection = db[COLLECTION_NAME]
+# Every write also appends the new state to an append-only history
+# collection (HISTORY_COLLECTION_NAME), which serves
+# GET /schemes/{name}?as_of= and restores; see repository_from_env.
+# MONGO_TRANSACTIONS=1 commits each write and its history entry together
+# (needs a replica set); without it a failed history insert is logged and
+# counted, and the write still succeeds. History superseded more than
+# HISTORY_RETENTION_DAYS ago is compacted every
+# HISTORY_COMPACTION_INTERVAL_SECONDS; 0 keeps it all.
+HISTORY_RETENTION_DAYS = float(os.getenv("HISTORY_RETENTION_DAYS", "0"))
+HISTORY_COMPACTION_INTERVAL_SECONDS = float(os.getenv("HISTORY_COMPACTION_INTERVAL_SECONDS", str(24 * 60 * 60)))
+
+# Connection pool settings. Checkouts that wait longer than the wait-queue
+# timeout, or arrive while MONGO_MAX_WAITING operations are already queued,
+# get a 503 instead of piling up behind a slow database.
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_MAX_CONNECTING = int(os.getenv("MONGO_MAX_CONNECTING", "2"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "2000"))
+MONGO_MAX_WAITING = int(os.getenv("MONGO_MAX_WAITING", str(MONGO_MAX_POOL_SIZE)))
+
+# Per-client token buckets: RATE_LIMIT_PER_SECOND requests a second with
+# bursts of up to RATE_LIMIT_BURST; 0 turns the limiter off. Clients are
+# keyed on their address; behind RATE_LIMIT_PROXY_HOPS trusted proxies that
+# is the X-Forwarded-For entry the outermost proxy added (see ratelimit.py).
+# Buckets are per worker, so the real limit is the rate x WEB_CONCURRENCY
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "0"))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "100"))
+RATE_LIMIT_PROXY_HOPS = int(os.getenv("RATE_LIMIT_PROXY_HOPS", "0"))
+
+# Readiness probes give up on the Mongo ping after this many seconds
+READINESS_TIMEOUT = float(os.getenv("READINESS_TIMEOUT", "2"))
+
+logger = logging.getLogger(__name__)
+
+# Page size limits for GET /schemes
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Responses at least this many bytes are brotli/gzip compressed
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+
+# Request and Mongo metrics on /metrics; lower METRICS_SAMPLE_RATE (0-1) to
+# time only a fraction of requests and commands, or disable with METRICS_ENABLED=0.
+# They are per process: with several gunicorn workers each scrape reports
+# whichever worker answered, so counters may seem to reset between scrapes
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_SAMPLE_RATE = float(os.getenv("METRICS_SAMPLE_RATE", "1.0"))
+
+# Set SCRAPER_CONFIG to a portal config file (see scraper.py) to scrape the
+# portals every SCRAPER_INTERVAL_SECONDS
+SCRAPER_CONFIG = os.getenv("SCRAPER_CONFIG")
+SCRAPER_INTERVAL_SECONDS = float(os.getenv("SCRAPER_INTERVAL_SECONDS", str(6 * 60 * 60)))
+
+# Scraping and history compaction run in only one worker per host: the one
+# holding that job's lock file in BACKGROUND_LOCK_DIR
+BACKGROUND_LOCK_DIR = os.getenv("BACKGROUND_LOCK_DIR", tempfile.gettempdir())
+
+# Number of schemes validated and written per bulk_write in POST /schemes/bulk
+BULK_CHUNK_SIZE = 500
+
+# Most startup profiles accepted by one POST /schemes/eligibility/batch, and
+# most (profile x scheme) checks, as evaluation time grows with both
+MAX_ELIGIBILITY_PROFILES = int(os.getenv("MAX_ELIGIBILITY_PROFILES", "10000"))
+MAX_ELIGIBILITY_CHECKS = int(os.getenv("MAX_ELIGIBILITY_CHECKS", "50000000"))
+
+# Set SCHEME_CHANGE_STREAM=1 to also apply writes made by other workers to
+# the in-process caches and recommender, and to source /schemes/events from
+# the change stream instead of this worker's handlers (needs a replica set)
+SCHEME_CHANGE_STREAM = os.getenv("SCHEME_CHANGE_STREAM", "0") == "1"
+
+# Read-through caches for single schemes and JSON list pages, holding the
+# encoded response bodies so a hit skips serialization too. Single schemes
+# are cached as (ETag, body).
+# Write handlers invalidate them.
+SCHEME_CACHE_SIZE = int(os.getenv("SCHEME_CACHE_SIZE", "1024"))
+SCHEME_CACHE_TTL = float(os.getenv("SCHEME_CACHE_TTL", "60"))
+
+scheme_cache = TTLCache(SCHEME_CACHE_SIZE, SCHEME_CACHE_TTL)
+page_cache = TTLCache(SCHEME_CACHE_SIZE, SCHEME_CACHE_TTL)
+
+# Concurrent cache misses for the same scheme share one Mongo query
+scheme_lookups = SingleFlight()
+
+rate_limiter = TokenBucketLimiter(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST) if RATE_LIMIT_PER_SECOND > 0 else None
+
+pool_monitor = PoolMonitor(MONGO_MAX_POOL_SIZE)
+
+# Change events for /schemes/events; the last SCHEME_EVENT_HISTORY are kept
+# so reconnecting clients can catch up from Last-Event-ID
+event_broker = EventBroker(int(os.getenv("SCHEME_EVENT_HISTORY", "1000")))
+SSE_KEEPALIVE_SECONDS = 15
+
+# Feature vectors for /schemes/recommend, kept in step with every write
+recommender = SchemeRecommender(int(os.getenv("RECOMMENDER_FEATURES", "512")))
+
+# Compiled eligibility rules for /schemes/eligibility/batch, kept in step the same way
+eligibility_index = EligibilityIndex()
+
+# Catalogue version behind the ETag / Last-Modified headers on list and
+# search reads (a single scheme's ETag is its own version instead). It
+# expires on the cache TTL too, so writes this process didn't see (the
+# scraper CLI, other clients) reach revalidating clients within about two TTLs
+catalog_version = CatalogVersion(SCHEME_CACHE_TTL)
+
+def _new_process_ids() -> None:
+    # Workers forked from a preloaded master would otherwise share boot ids,
+    # and so hand out colliding ETags and event ids
+    catalog_version.new_boot_id()
+    event_broker.new_boot_id()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_new_process_ids)
+
+_background_locks = {}
+
+def _holds_background_lock(job: str) -> bool:
+    """Take, without waiting, or keep this host's lock for a background job"""
+    if fcntl is None or job in _background_locks:
+        return True
+    handle = open(os.path.join(BACKGROUND_LOCK_DIR, f"schemes-{DB_NAME}-{COLLECTION_NAME}-{job}.lock"), "w")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return False
+    # Held until this process exits, then the next worker to try takes over
+    _background_locks[job] = handle
+    return True
+
+def _end_streams_on_shutdown() -> None:
+    """End SSE streams as soon as the server is told to stop.
+
+    Servers only run the lifespan shutdown once in-flight responses finish,
+    and an event stream never finishes by itself, so each drain would wait
+    out the graceful timeout. Chains onto the server's own signal handlers.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        previous = signal.getsignal(signum)
+        if not callable(previous):
+            continue
+
+        def handler(signum, frame, previous=previous):
+            loop.call_soon_threadsafe(event_broker.close)
+            previous(signum, frame)
+
+        signal.signal(signum, handler)
+
+def _invalidate_schemes(*scheme_names: str) -> None:
+    """Drop cached copies of the given schemes and every cached list page"""
+    scheme_cache.invalidate(*scheme_names)
+    page_cache.clear()
+    catalog_version.bump()
+
+def _invalidate_all() -> None:
+    scheme_cache.clear()
+    page_cache.clear()
+    catalog_version.bump()
+
+def _json_body(body: bytes, headers: dict) -> Response:
+    """Wrap an already-encoded JSON body"""
+    return Response(body, media_type="application/json", headers=headers)
+
+def _not_modified(request: Request) -> Response | None:
+    """Return a 304 if the client's copy matches the current catalogue"""
+    if catalog_version.matches(request.headers.get("if-none-match"), request.headers.get("if-modified-since")):
+        return Response(status_code=304, headers=catalog_version.headers())
+    return None
+
+def _publish(event_type: str, scheme_name: str, **data) -> None:
+    # With the change stream on, every worker publishes from it instead
+    if not SCHEME_CHANGE_STREAM:
+        event_broker.publish(event_type, scheme_name, **data)
+
+def _index_scheme(doc: dict) -> None:
+    recommender.upsert(doc)
+    eligibility_index.upsert(doc)
+
+def _unindex_scheme(scheme_name: str) -> None:
+    recommender.remove(scheme_name)
+    eligibility_index.remove(scheme_name)
+
+def _schemes_written(written: list[tuple[dict, str]]) -> None:
+    """Refresh in-process state after a batch of upserts"""
+    _invalidate_schemes(*(doc["scheme_name"] for doc, _ in written))
+    for doc, status in written:
+        _index_scheme(doc)
+        _publish("insert" if status == "inserted" else "update", doc["scheme_name"], scheme=doc)
+
+def _apply_change(change: dict) -> None:
+    doc = change.get("fullDocument")
+    doc_id = change.get("documentKey", {}).get("_id")
+    renamed = "scheme_name" in change.get("updateDescription", {}).get("updatedFields", {})
+    previous_name = recommender.name_for_id(doc_id)
+    if doc:
+        if previous_name and previous_name != doc["scheme_name"]:
+            eligibility_index.remove(previous_name)
+        _index_scheme(doc)
+        scheme = {key: value for key, value in doc.items() if key != "_id"}
+        event_type = "insert" if change["operationType"] == "insert" else "update"
+        extra = {"previous_name": previous_name} if previous_name and previous_name != doc["scheme_name"] else {}
+        event_broker.publish(event_type, doc["scheme_name"], scheme=scheme, **extra)
+    elif change["operationType"] == "delete":
+        recommender.remove_id(doc_id)
+        if previous_name:
+            eligibility_index.remove(previous_name)
+        event_broker.publish("delete", previous_name, id=str(doc_id))
+
+    if doc and not renamed:
+        _invalidate_schemes(doc["scheme_name"])
+    else:
+        # Deletes and renames only carry the _id, so drop everything
+        _invalidate_all()
+
+async def _watch_changes(repo: SchemeRepository) -> None:
+    resume_token = None
+    while True:
+        try:
+            async with repo.watch(resume_after=resume_token) as stream:
+                async for change in stream:
+                    _apply_change(change)
+                    resume_token = stream.resume_token
+        except ConnectionFailure as exc:
+            # Resume from the last token once Mongo is reachable again
+            logger.warning("Change stream disconnected, resuming: %s", exc)
+            await asyncio.sleep(5)
+        except PyMongoError as exc:
+            # The token can't be resumed (e.g. oplog rolled over): start afresh
+            logger.warning("Change stream failed, restarting: %s", exc)
+            resume_token = None
+            _invalidate_all()
+            event_broker.reset()
+            await asyncio.sleep(5)
+
+async def _load_indexes(repo: SchemeRepository) -> None:
+    async for doc in repo.iter_schemes(keep_id=True):
+        _index_scheme(doc)
+    logger.info("Recommender and eligibility rules loaded for %d schemes", len(recommender))
+
+async def _scrape_periodically(repo: SchemeRepository) -> None:
+    service = SchemeService(repo, load_portals(SCRAPER_CONFIG), on_write=_schemes_written)
+    while True:
+        if _holds_background_lock("scraper"):
+            try:
+                await service.run()
+            except PyMongoError as exc:
+                logger.error("Scheme scrape failed: %s", exc)
+        await asyncio.sleep(SCRAPER_INTERVAL_SECONDS)
+
+async def _compact_history_periodically(repo: SchemeRepository) -> None:
+    while True:
+        if _holds_background_lock("history-compaction"):
+            try:
+                removed = await repo.compact_history(datetime.now(timezone.utc) - timedelta(days=HISTORY_RETENTION_DAYS))
+                logger.info("History compaction removed %d entries", removed)
+            except PyMongoError as exc:
+                logger.error("History compaction failed: %s", exc)
+        await asyncio.sleep(HISTORY_COMPACTION_INTERVAL_SECONDS)
+
+# Open one Motor client per process (per worker, after any fork) for the lifetime of the app
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    listeners = [pool_monitor]
+    if METRICS_ENABLED:
+        listeners.append(MongoCommandMetrics(METRICS_SAMPLE_RATE))
+    client = AsyncIOMotorClient(
+        MONGO_URI,
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+        maxConnecting=MONGO_MAX_CONNECTING,
+        serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+        waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        event_listeners=listeners,
+    )
+    app.state.repo = repository_from_env(client[DB_NAME])
+    # Keep serving if index creation fails (e.g. existing duplicate names);
+    # the error is reported on /diagnostics/indexes instead
+    app.state.index_error = None
+    try:
+        await app.state.repo.ensure_indexes()
+    except PyMongoError as exc:
+        logger.error("Index provisioning failed: %s", exc)
+        app.state.index_error = str(exc)
+    try:
+        if seeded := await app.state.repo.backfill_history():
+            logger.info("Seeded scheme history with %d existing schemes", seeded)
+    except PyMongoError as exc:
+        logger.error("Seeding scheme history failed: %s", exc)
+    try:
+        await _load_indexes(app.state.repo)
+    except PyMongoError as exc:
+        logger.error("Loading the recommender and eligibility rules failed: %s", exc)
+    background = []
+    if SCHEME_CHANGE_STREAM:
+        background.append(asyncio.create_task(_watch_changes(app.state.repo)))
+    if SCRAPER_CONFIG:
+        background.append(asyncio.create_task(_scrape_periodically(app.state.repo)))
+    if HISTORY_RETENTION_DAYS > 0:
+        background.append(asyncio.create_task(_compact_history_periodically(app.state.repo)))
+    _end_streams_on_shutdown()
+    try:
+        yield
+    finally:
+        for task in background:
+            task.cancel()
+        client.close()
 
 # FastAPI instance
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MINIMUM_SIZE)
+if rate_limiter:
+    # Outside compression, so rejected requests do no other work
+    app.add_middleware(
+        RateLimitMiddleware,
+        limiter=rate_limiter,
+        proxy_hops=RATE_LIMIT_PROXY_HOPS,
+    )
+if METRICS_ENABLED:
+    # Added last so it is outermost and its timings include compression
+    app.add_middleware(MetricsMiddleware, sample_rate=METRICS_SAMPLE_RATE)
+
+# Tests can swap the repository with app.dependency_overrides[get_repo]
+def get_repo(request: Request) -> SchemeRepository:
+    # Shed load early rather than queue behind a saturated pool
+    if pool_monitor.waiting >= MONGO_MAX_WAITING:
+        raise HTTPException(status_code=503, detail="Database busy, retry shortly", headers={"Retry-After": "1"})
+    return request.app.state.repo
+
+# Timeouts and unreachable servers become 503s that clients can retry
+@app.exception_handler(PyMongoError)
+async def mongo_error_handler(request: Request, exc: PyMongoError):
+    if exc.timeout or isinstance(exc, ConnectionFailure):
+        logger.warning("Mongo unavailable: %s", exc)
+        return FastJSONResponse(
+            {"detail": "Database unavailable, retry shortly"}, status_code=503, headers={"Retry-After": "1"}
+        )
+    logger.exception("Mongo error", exc_info=exc)
+    return FastJSONResponse({"detail": "Database error"}, status_code=500)
+
+# ✅ Structured eligibility rules; omitted or empty rules don't restrict
+class EligibilityCriteria(BaseModel):
+    sectors: list[str] | None = None
+    stages: list[str] | None = None
+    states: list[str] | None = None
+    max_turnover: float | None = Field(None, ge=0)
+    min_age_years: float | None = Field(None, ge=0)
+    max_age_years: float | None = Field(None, ge=0)
 
 # ✅ Pydantic model for input validation
 class Scheme(BaseModel):
@@ -25,45 +403,461 @@ class Scheme(BaseModel):
     description: str
     ministry: str | None = None
     benefits: list[str] | None = None
+    eligibility_criteria: EligibilityCriteria | None = None
+
+# Named field selections for ?fields= on GET /schemes; None means every field
+FIELD_VIEWS = {
+    "summary": ("scheme_name", "ministry"),
+    "full": None,
+}
+
+def _projection(fields: str) -> tuple[tuple | None, dict | None]:
+    """Resolve ?fields= (a view name or comma-separated field names).
+
+    Returns a hashable cache key for the selection and the Mongo projection.
+    scheme_name is always included so list items stay identifiable.
+    """
+    if fields in FIELD_VIEWS:
+        selected = FIELD_VIEWS[fields]
+    else:
+        selected = tuple(field.strip() for field in fields.split(",") if field.strip())
+        unknown = sorted(set(selected) - set(Scheme.model_fields))
+        if unknown or not selected:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields {unknown}; use a view ({', '.join(FIELD_VIEWS)}) or any of {list(Scheme.model_fields)}",
+            )
+    if selected is None:
+        return None, None
+    selected = tuple(sorted({"scheme_name", *selected}))
+    return selected, {field: 1 for field in selected}
+
+# ✅ Partial update; only the fields present in the body are set
+class SchemePatch(BaseModel):
+    # Typed without None, so sending null for them is rejected
+    scheme_name: str = None
+    description: str = None
+    ministry: str | None = None
+    benefits: list[str] | None = None
+    eligibility_criteria: EligibilityCriteria | None = None
+
+def _scheme_etag(doc: dict) -> str:
+    """Strong ETag of a stored scheme: its document id and version.
+
+    A name that is deleted and re-created starts again at version 1, so the
+    id keeps an old tag from matching the new document.
+    """
+    return f'"{doc["_id"]}-{doc.get("version", 0)}"'
+
+def _expected_version(if_match: str | None) -> tuple[ObjectId | None, int | None]:
+    """The document id and version an If-Match header requires; Nones if any will do"""
+    if if_match is None or if_match.strip() == "*":
+        return None, None
+    doc_id, _, version = if_match.strip().strip('"').partition("-")
+    if not ObjectId.is_valid(doc_id) or not version.isdigit():
+        # Scheme tags are strong validators, so weak or foreign tags never match
+        raise HTTPException(status_code=412, detail="If-Match must be an ETag from GET /schemes/{name}")
+    return ObjectId(doc_id), int(version)
+
+async def _write_missed(repo: SchemeRepository, scheme_name: str, expected_version: int | None) -> HTTPException:
+    """Tell a missing scheme apart from one another editor changed first"""
+    if expected_version is not None and await repo.get(scheme_name):
+        return HTTPException(status_code=412, detail="Scheme was modified by someone else; refetch and retry")
+    return HTTPException(status_code=404, detail="Scheme not found")
+
+def _scheme_data(scheme: Scheme) -> dict:
+    # Build the document manually to avoid any Pydantic issues
+    return {
+        "scheme_name": scheme.scheme_name,
+        "description": scheme.description,
+        "ministry": scheme.ministry,
+        "benefits": scheme.benefits,
+        "eligibility_criteria": (
+            scheme.eligibility_criteria.model_dump() if scheme.eligibility_criteria else None
+        ),
+    }
 
 # Root route
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "🚀 CampusFounders Schemes API is running!"}
 
-# ✅ Get all schemes
+async def _stream_ndjson(docs):
+    """Yield one JSON line per document as it arrives from the cursor"""
+    async for doc in docs:
+        yield dumps_line(doc)
+
+# ✅ Liveness: the process is up and serving
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok", "pool": pool_monitor.snapshot()}
+
+# ✅ Readiness: Mongo answers and the pool isn't saturated
+@app.get("/readyz")
+async def readyz(request: Request):
+    pool = pool_monitor.snapshot()
+    checks = {"mongo": "ok", "pool": "ok"}
+    try:
+        await asyncio.wait_for(request.app.state.repo.ping(), READINESS_TIMEOUT)
+    except (PyMongoError, asyncio.TimeoutError) as exc:
+        checks["mongo"] = str(exc) or "timed out"
+    if pool["waiting"] >= MONGO_MAX_WAITING:
+        checks["pool"] = "saturated"
+
+    ready = all(value == "ok" for value in checks.values())
+    return FastJSONResponse(
+        {"ready": ready, "checks": checks, "pool": pool, "recommender_schemes": len(recommender)},
+        status_code=200 if ready else 503,
+    )
+
+# ✅ Prometheus metrics
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    SSE_SUBSCRIBERS.set(event_broker.subscriber_count)
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+# ✅ Index diagnostics
+@app.get("/diagnostics/indexes")
+async def index_diagnostics(request: Request, repo: SchemeRepository = Depends(get_repo)):
+    indexes = await repo.index_status()
+    return {
+        "ok": all(index["present"] for index in indexes.values()),
+        "indexes": indexes,
+        "error": getattr(request.app.state, "index_error", None),
+    }
+
+# ✅ Cache diagnostics
+@app.get("/diagnostics/cache")
+async def cache_diagnostics():
+    return {
+        "schemes": scheme_cache.stats(),
+        "pages": page_cache.stats(),
+        "scheme_lookups": scheme_lookups.stats(),
+        "rate_limiter": rate_limiter.stats() if rate_limiter else None,
+    }
+
+# ✅ Get schemes, one page at a time (keyset pagination on _id)
 @app.get("/schemes")
-def get_schemes():
-    schemes = list(collection.find({}, {"_id": 0}))
-    return {"schemes": schemes}
+async def get_schemes(
+    request: Request,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: str | None = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    fields: str = "full",
+    repo: SchemeRepository = Depends(get_repo),
+):
+    selection, projection = _projection(fields)
+    if not_modified := _not_modified(request):
+        return not_modified
+    # Take the version before querying so a concurrent write can't be masked
+    version_headers = catalog_version.headers()
 
-# ✅ Get one scheme by name
-@app.get("/schemes/{scheme_name}")
-def get_scheme(scheme_name: str):
-    scheme = collection.find_one({"scheme_name": scheme_name}, {"_id": 0})
+    after_id = None
+    if after:
+        try:
+            after_id = ObjectId(after)
+        except InvalidId:
+            raise HTTPException(status_code=400, detail="Invalid 'after' cursor")
+
+    # NDJSON streams every matching scheme unless a limit is given
+    if format == "ndjson":
+        docs = repo.iter_schemes(after_id, limit, projection=projection)
+        return StreamingResponse(_stream_ndjson(docs), media_type="application/x-ndjson", headers=version_headers)
+
+    limit = limit or DEFAULT_PAGE_SIZE
+    cache_key = (after, limit, selection)
+    body = page_cache.get(cache_key)
+    if body is not None:
+        return _json_body(body, version_headers)
+
+    generation = page_cache.generation
+    schemes = await repo.list_page(after_id, limit, projection)
+    next_after = str(schemes[-1]["_id"]) if len(schemes) == limit else None
+    for scheme in schemes:
+        scheme.pop("_id")
+    body = dumps({"schemes": schemes, "next_after": next_after})
+    page_cache.set(cache_key, body, generation)
+    return _json_body(body, version_headers)
+
+async def _iter_json_items(items):
+    for item in items:
+        yield item
+
+async def _iter_ndjson_lines(request: Request):
+    """Yield non-empty lines from a streamed NDJSON request body"""
+    buffer = b""
+    async for block in request.stream():
+        buffer += block
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+async def _ingest_chunk(repo: SchemeRepository, chunk: list, ordered: bool) -> tuple[list[dict], bool]:
+    """Validate and upsert one chunk; returns its results and whether to stop"""
+    results = []
+    valid = []
+    stopped = False
+    for index, raw in chunk:
+        if stopped:
+            results.append({"index": index, "status": "skipped"})
+            continue
+        try:
+            if isinstance(raw, bytes):
+                scheme = Scheme.model_validate_json(raw)
+            else:
+                scheme = Scheme.model_validate(raw)
+        except ValidationError as exc:
+            results.append({
+                "index": index,
+                "status": "invalid",
+                "error": exc.errors(include_url=False, include_context=False),
+            })
+            # Ordered ingestion stops at the first bad item
+            stopped = ordered
+            continue
+        valid.append((index, _scheme_data(scheme)))
+
+    outcomes = await repo.bulk_upsert([doc for _, doc in valid], ordered=ordered)
+    written = []
+    for (index, doc), outcome in zip(valid, outcomes):
+        stored = outcome.pop("scheme", None)
+        results.append({"index": index, "scheme_name": doc["scheme_name"], **outcome})
+        if stored is not None:
+            written.append((stored, outcome["status"]))
+        if outcome["status"] == "error" and ordered:
+            stopped = True
+    if written:
+        _schemes_written(written)
+    results.sort(key=lambda item: item["index"])
+    return results, stopped
+
+# ✅ Add or update many schemes at once (JSON array or NDJSON body)
+@app.post("/schemes/bulk")
+async def bulk_upsert_schemes(request: Request, ordered: bool = True, repo: SchemeRepository = Depends(get_repo)):
+    started = time.perf_counter()
+
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        items = _iter_ndjson_lines(request)
+    else:
+        try:
+            payload = orjson.loads(await request.body())
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Request body is not valid JSON")
+        if not isinstance(payload, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array of schemes")
+        items = _iter_json_items(payload)
+
+    results = []
+    chunk = []
+    stopped = False
+    index = 0
+    async for raw in items:
+        if stopped:
+            results.append({"index": index, "status": "skipped"})
+        else:
+            chunk.append((index, raw))
+            if len(chunk) == BULK_CHUNK_SIZE:
+                chunk_results, stopped = await _ingest_chunk(repo, chunk, ordered)
+                results.extend(chunk_results)
+                chunk = []
+        index += 1
+    if chunk:
+        chunk_results, stopped = await _ingest_chunk(repo, chunk, ordered)
+        results.extend(chunk_results)
+
+    elapsed = time.perf_counter() - started
+    counts = {status: 0 for status in ("inserted", "updated", "invalid", "error", "skipped")}
+    for item in results:
+        counts[item["status"]] += 1
+    return {
+        "ordered": ordered,
+        "received": len(results),
+        **counts,
+        "elapsed_seconds": round(elapsed, 4),
+        "schemes_per_second": round(len(results) / elapsed, 1) if elapsed else None,
+        "results": results,
+    }
+
+# ✅ Full-text search with ministry facets
+@app.get("/schemes/search")
+async def search_schemes(
+    request: Request,
+    q: str | None = None,
+    ministry: list[str] | None = Query(None),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    repo: SchemeRepository = Depends(get_repo),
+):
+    if not_modified := _not_modified(request):
+        return not_modified
+    version_headers = catalog_version.headers()
+    return FastJSONResponse(await repo.search(q, ministry, limit), headers=version_headers)
+
+# ✅ Server-Sent Events feed of scheme inserts, updates and deletes
+@app.get("/schemes/events")
+async def scheme_events(
+    last_event_id: str | None = None,
+    last_event_id_header: str | None = Header(None, alias="Last-Event-ID"),
+):
+    # EventSource resends Last-Event-ID on reconnect; the query parameter
+    # lets a fresh page resume from an id it stored itself
+    subscriber, replay, reset = event_broker.subscribe(last_event_id_header or last_event_id)
+
+    async def stream():
+        try:
+            if reset:
+                yield format_reset()
+            for event in replay:
+                yield format_sse(event)
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                if event is None:
+                    # Fell too far behind; the client must resync
+                    yield format_reset()
+                    return
+                yield format_sse(event)
+        finally:
+            event_broker.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# ✅ Startup profile used for recommendations
+class StartupProfile(BaseModel):
+    industry: str
+    stage: str | None = None
+    location: str | None = None
+    team_size: int | None = None
+    keywords: list[str] | None = None
+
+# ✅ Recommend schemes for a startup profile
+@app.post("/schemes/recommend")
+async def recommend_schemes(
+    profile: StartupProfile,
+    limit: int = Query(10, ge=1, le=100),
+    repo: SchemeRepository = Depends(get_repo),
+):
+    query = recommender.profile_vector(
+        profile.industry, profile.stage, profile.location, profile.team_size, profile.keywords
+    )
+    ranked = recommender.rank(query, limit)
+    schemes = await repo.get_many([name for name, _ in ranked])
+    return FastJSONResponse({
+        "recommendations": [
+            {**schemes[name], "score": score} for name, score in ranked if name in schemes
+        ]
+    })
+
+# ✅ Startup facts checked against eligibility rules
+class EligibilityProfile(BaseModel):
+    sector: str | None = None
+    stage: str | None = None
+    state: str | None = None
+    turnover: float | None = None
+    incorporation_date: date | None = None
+
+# ✅ Check many startup profiles against every scheme's eligibility rules
+@app.post("/schemes/eligibility/batch")
+async def eligibility_batch(profiles: list[EligibilityProfile]):
+    if len(profiles) > MAX_ELIGIBILITY_PROFILES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_ELIGIBILITY_PROFILES} profiles per request")
+    if len(profiles) * len(eligibility_index) > MAX_ELIGIBILITY_CHECKS:
+        limit = MAX_ELIGIBILITY_CHECKS // len(eligibility_index)
+        raise HTTPException(status_code=413, detail=f"At most {limit} profiles per request against {len(eligibility_index)} schemes")
+    started = time.perf_counter()
+    # Seconds of NumPy work for large batches: keep it off the event loop
+    matches = await run_in_threadpool(
+        lambda: list(eligibility_index.evaluate([profile.model_dump() for profile in profiles]))
+    )
+    results = [{"index": index, "eligible": names} for index, names in enumerate(matches)]
+    return {
+        "profiles": len(profiles),
+        "schemes": len(eligibility_index),
+        "elapsed_seconds": round(time.perf_counter() - started, 4),
+        "results": results,
+    }
+
+async def _load_scheme_body(repo: SchemeRepository, scheme_name: str, generation: int) -> tuple[str, bytes] | None:
+    scheme = await repo.get(scheme_name, keep_id=True)
     if not scheme:
-        raise HTTPException(status_code=404, detail="Scheme not found")
-    return scheme
+        return None
+    # The same strong tag PUT and PATCH take in If-Match
+    etag = _scheme_etag(scheme)
+    scheme.pop("_id")
+    entry = (etag, dumps(scheme))
+    scheme_cache.set(scheme_name, entry, generation)
+    return entry
+
+def _scheme_not_modified(request: Request, etag: str) -> bool:
+    """True if the client's copy of a scheme with this ETag is still current"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison, as RFC 9110 requires for If-None-Match
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags
+    return catalog_version.matches(None, request.headers.get("if-modified-since"))
+
+async def _scheme_as_of(repo: SchemeRepository, scheme_name: str, as_of: datetime) -> Response:
+    if as_of.tzinfo is None:
+        as_of = as_of.replace(tzinfo=timezone.utc)
+    if HISTORY_RETENTION_DAYS > 0 and as_of < datetime.now(timezone.utc) - timedelta(days=HISTORY_RETENTION_DAYS):
+        raise HTTPException(status_code=410, detail=f"History older than {HISTORY_RETENTION_DAYS:g} days is compacted")
+    scheme = await repo.get_as_of(scheme_name, as_of)
+    if scheme is None:
+        raise HTTPException(status_code=404, detail="Scheme not found at that time")
+    return FastJSONResponse(scheme)
 
-# ✅ Add a new scheme - SIMPLE AND WORKING VERSION
+# ✅ Get one scheme by name, now or as it was at ?as_of= (ISO 8601, UTC if no offset)
+@app.get("/schemes/{scheme_name}")
+async def get_scheme(
+    scheme_name: str,
+    request: Request,
+    as_of: datetime | None = None,
+    repo: SchemeRepository = Depends(get_repo),
+):
+    if as_of is not None:
+        return await _scheme_as_of(repo, scheme_name, as_of)
+    # Last-Modified stays the catalogue's: no later than any change to this scheme
+    last_modified = catalog_version.headers()["Last-Modified"]
+
+    entry = scheme_cache.get(scheme_name)
+    if entry is None:
+        # Keyed on the generation too, so a lookup started before a write is
+        # never shared with requests that arrive after it
+        generation = scheme_cache.generation
+        entry = await scheme_lookups.do(
+            (scheme_name, generation), lambda: _load_scheme_body(repo, scheme_name, generation)
+        )
+        if entry is None:
+            raise HTTPException(status_code=404, detail="Scheme not found")
+    etag, body = entry
+    headers = {"ETag": etag, "Last-Modified": last_modified}
+    if _scheme_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return _json_body(body, headers)
+
+# ✅ Add a new scheme
 @app.post("/schemes")
-def add_scheme(scheme: Scheme):
-    # Check if scheme already exists
-    existing_scheme = collection.find_one({"scheme_name": scheme.scheme_name})
-    if existing_scheme:
+async def add_scheme(scheme: Scheme, repo: SchemeRepository = Depends(get_repo)):
+    # The unique index on scheme_name rejects duplicates atomically
+    scheme_data = _scheme_data(scheme)
+    try:
+        await repo.insert(scheme_data)
+    except DuplicateKeyError:
         raise HTTPException(status_code=400, detail="Scheme with this name already exists")
-    
-    # Convert to dict and insert
-    scheme_data = {
-        "scheme_name": scheme.scheme_name,
-        "description": scheme.description,
-        "ministry": scheme.ministry,
-        "benefits": scheme.benefits
-    }
-    
-    # Insert without returning the MongoDB result object
-    collection.insert_one(scheme_data)
-    
+    _invalidate_schemes(scheme.scheme_name)
+    _index_scheme(scheme_data)
+    _publish("insert", scheme.scheme_name, scheme=scheme_data)
+
     # Return simple success response
     return {
         "message": "Scheme added successfully",
@@ -72,27 +866,83 @@ def add_scheme(scheme: Scheme):
 
 # ✅ Update a scheme
 @app.put("/schemes/{scheme_name}")
-def update_scheme(scheme_name: str, scheme: Scheme):
-    # Create update data manually to avoid any Pydantic issues
-    update_data = {
-        "scheme_name": scheme.scheme_name,
-        "description": scheme.description,
-        "ministry": scheme.ministry,
-        "benefits": scheme.benefits
-    }
-    
-    result = collection.update_one(
-        {"scheme_name": scheme_name}, 
-        {"$set": update_data}
-    )
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Scheme not found")
+async def update_scheme(
+    scheme_name: str,
+    scheme: Scheme,
+    if_match: str | None = Header(None),
+    repo: SchemeRepository = Depends(get_repo),
+):
+    scheme_data = _scheme_data(scheme)
+    expected_id, expected_version = _expected_version(if_match)
+    try:
+        updated = await repo.update(scheme_name, scheme_data, expected_version, expected_id)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Scheme with this name already exists")
+    if not updated:
+        raise await _write_missed(repo, scheme_name, expected_version)
+    _invalidate_schemes(scheme_name, scheme.scheme_name)
+    extra = {}
+    if scheme_name != scheme.scheme_name:
+        _unindex_scheme(scheme_name)
+        extra["previous_name"] = scheme_name
+    _index_scheme(scheme_data)
+    _publish("update", scheme.scheme_name, scheme=scheme_data, **extra)
     return {"message": "Scheme updated successfully"}
 
-# ✅ Delete a scheme
+# ✅ Update some fields of a scheme (If-Match with the scheme's ETag guards against lost updates)
+@app.patch("/schemes/{scheme_name}")
+async def patch_scheme(
+    scheme_name: str,
+    patch: SchemePatch,
+    if_match: str | None = Header(None),
+    repo: SchemeRepository = Depends(get_repo),
+):
+    # Top-level fields only: a patched eligibility_criteria replaces the old one
+    fields = {field: value for field, value in patch.model_dump().items() if field in patch.model_fields_set}
+    if not fields:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    expected_id, expected_version = _expected_version(if_match)
+    try:
+        doc = await repo.patch(scheme_name, fields, expected_version, expected_id)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Scheme with this name already exists")
+    if doc is None:
+        raise await _write_missed(repo, scheme_name, expected_version)
+
+    _invalidate_schemes(scheme_name, doc["scheme_name"])
+    extra = {}
+    if scheme_name != doc["scheme_name"]:
+        _unindex_scheme(scheme_name)
+        extra["previous_name"] = scheme_name
+    _index_scheme(doc)
+    etag = _scheme_etag(doc)
+    doc.pop("_id", None)
+    _publish("update", doc["scheme_name"], scheme=doc, **extra)
+    # The updated document, so the client needs no follow-up GET
+    return FastJSONResponse(doc, headers={"ETag": etag})
+
+# ✅ Restore a deleted scheme from its last recorded state
+@app.post("/schemes/{scheme_name}/restore")
+async def restore_scheme(scheme_name: str, repo: SchemeRepository = Depends(get_repo)):
+    try:
+        doc = await repo.restore(scheme_name)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Scheme with this name already exists")
+    if doc is None:
+        raise HTTPException(status_code=404, detail="No earlier version of this scheme to restore")
+    _invalidate_schemes(scheme_name)
+    _index_scheme(doc)
+    etag = _scheme_etag(doc)
+    doc.pop("_id", None)
+    _publish("insert", scheme_name, scheme=doc)
+    return FastJSONResponse(doc, headers={"ETag": etag})
+
+# ✅ Delete a scheme (its history is kept)
 @app.delete("/schemes/{scheme_name}")
-def delete_scheme(scheme_name: str):
-    result = collection.delete_one({"scheme_name": scheme_name})
-    if result.deleted_count == 0:
+async def delete_scheme(scheme_name: str, repo: SchemeRepository = Depends(get_repo)):
+    if not await repo.delete(scheme_name):
         raise HTTPException(status_code=404, detail="Scheme not found")
-    return {"message": "Scheme deleted successfully"}
\ No newline at end of file
+    _invalidate_schemes(scheme_name)
+    _unindex_scheme(scheme_name)
+    _publish("delete", scheme_name)
+    return {"message": "Scheme deleted successfully"}
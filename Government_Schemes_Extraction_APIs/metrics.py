@@ -0,0 +1,258 @@
+"""Prometheus-style request and MongoDB metrics, rendered in the text format."""
+import random
+import threading
+import time
+from bisect import bisect_left
+
+from pymongo import monitoring
+
+# Latency buckets in seconds, shared by request and Mongo histograms
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        # pymongo listeners run on Motor's worker threads
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.extend(self._render_value(labels, value))
+        return lines
+
+    def _render_value(self, labels: tuple, value) -> list[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {value}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+
+    def observe(self, value: float, *labels) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # [per-bucket counts (+Inf last), sum, count]
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _render_value(self, labels: tuple, state) -> list[str]:
+        counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+            cumulative += bucket_count
+            le = f'le="{bound}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+        lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status")))
+REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template (sampled).", ("method", "route")))
+IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled.", ("method",)))
+MONGO_COMMANDS = REGISTRY.register(Counter(
+    "mongodb_commands_total", "MongoDB commands by name and outcome.", ("command", "outcome")))
+MONGO_DURATION = REGISTRY.register(Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command round-trip time (sampled).", ("command",)))
+
+
+class MetricsMiddleware:
+    """Counts every request and times a `sample_rate` fraction of them.
+
+    Latency is labelled with the matched route template (for example
+    /schemes/{scheme_name}) so raw paths don't explode label cardinality.
+    """
+
+    def __init__(self, app, sample_rate: float = 1.0):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        sampled = self.sample_rate >= 1 or random.random() < self.sample_rate
+        started = time.perf_counter() if sampled else 0.0
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc(method)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            IN_FLIGHT.dec(method)
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            REQUESTS.inc(method, template, status)
+            if sampled:
+                REQUEST_DURATION.observe(time.perf_counter() - started, method, template)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """pymongo command listener feeding the mongodb_* metrics"""
+
+    def __init__(self, sample_rate: float = 1.0):
+        self.sample_rate = sample_rate
+
+    def _record(self, event, outcome: str) -> None:
+        MONGO_COMMANDS.inc(event.command_name, outcome)
+        if self.sample_rate >= 1 or random.random() < self.sample_rate:
+            MONGO_DURATION.observe(event.duration_micros / 1_000_000, event.command_name)
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event, "succeeded")
+
+    def failed(self, event):
+        self._record(event, "failed")
+
+
+MONGO_POOL_OPEN = REGISTRY.register(Gauge(
+    "mongodb_pool_connections", "Open connections across MongoDB connection pools."))
+MONGO_POOL_IN_USE = REGISTRY.register(Gauge(
+    "mongodb_pool_connections_in_use", "Connections currently checked out."))
+MONGO_POOL_WAITING = REGISTRY.register(Gauge(
+    "mongodb_pool_wait_queue", "Operations waiting to check out a connection."))
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Tracks open, checked-out and waiting connections for health checks.
+
+    Counts are summed over every server's pool, so `utilisation` is relative
+    to the pool size configured per server.
+    """
+
+    def __init__(self, max_pool_size: int):
+        self.max_pool_size = max_pool_size
+        self.open = 0
+        self.in_use = 0
+        self.waiting = 0
+        self._lock = threading.Lock()
+
+    def _adjust(self, field: str, gauge: Gauge, amount: int) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + amount)
+        gauge.inc(amount=amount)
+
+    def snapshot(self) -> dict:
+        return {
+            "max_pool_size": self.max_pool_size,
+            "open": self.open,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "utilisation": round(self.in_use / self.max_pool_size, 3) if self.max_pool_size else None,
+        }
+
+    def connection_check_out_started(self, event):
+        self._adjust("waiting", MONGO_POOL_WAITING, 1)
+
+    def connection_checked_out(self, event):
+        self._adjust("waiting", MONGO_POOL_WAITING, -1)
+        self._adjust("in_use", MONGO_POOL_IN_USE, 1)
+
+    def connection_check_out_failed(self, event):
+        self._adjust("waiting", MONGO_POOL_WAITING, -1)
+
+    def connection_checked_in(self, event):
+        self._adjust("in_use", MONGO_POOL_IN_USE, -1)
+
+    def connection_created(self, event):
+        self._adjust("open", MONGO_POOL_OPEN, 1)
+
+    def connection_closed(self, event):
+        self._adjust("open", MONGO_POOL_OPEN, -1)
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
@@ -0,0 +1,93 @@
+"""Per-client token-bucket rate limiting as ASGI middleware."""
+import math
+import time
+from collections import OrderedDict
+
+from starlette.datastructures import Headers
+
+from metrics import REGISTRY, Counter
+from serialization import FastJSONResponse
+
+RATE_LIMITED = REGISTRY.register(Counter(
+    "http_requests_rate_limited_total", "Requests rejected with 429 by the rate limiter.", ("method",)))
+
+# Probes and scrapes are never limited
+EXEMPT_PATHS = frozenset({"/healthz", "/readyz", "/metrics"})
+
+
+class TokenBucketLimiter:
+    """One token bucket per client key.
+
+    Each bucket holds up to `burst` tokens and refills at `rate` tokens per
+    second; a request spends one token. Buckets are kept in LRU order and
+    capped at `max_keys`. An evicted bucket comes back full, which is what
+    an idle client's bucket would be anyway.
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def acquire(self, key: str) -> float:
+        """Spend a token for `key`; returns 0, or the seconds until one is free"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def stats(self) -> dict:
+        return {"rate_per_second": self.rate, "burst": self.burst, "tracked_clients": len(self._buckets)}
+
+
+class RateLimitMiddleware:
+    """Answers 429 with Retry-After once a client's bucket is empty.
+
+    Clients are keyed on their address: the socket peer, or behind
+    `proxy_hops` trusted proxies (such as Render's), the X-Forwarded-For
+    entry the outermost of them added. Each proxy appends the address it
+    was connected from, so that is the `proxy_hops`-th entry from the right;
+    entries left of it are whatever the client sent and are never used.
+
+    Buckets live in this process, so with several workers a client gets up
+    to `rate` requests a second from each of them.
+    """
+
+    def __init__(self, app, limiter: TokenBucketLimiter, proxy_hops: int = 0):
+        self.app = app
+        self.limiter = limiter
+        self.proxy_hops = proxy_hops
+
+    def client_key(self, scope) -> str:
+        if self.proxy_hops:
+            forwarded = Headers(scope=scope).get("x-forwarded-for", "")
+            hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+            if len(hops) >= self.proxy_hops:
+                return "ip:" + hops[-self.proxy_hops]
+        client = scope.get("client")
+        return "ip:" + (client[0] if client else "unknown")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+        wait = self.limiter.acquire(self.client_key(scope))
+        if wait:
+            RATE_LIMITED.inc(scope["method"])
+            response = FastJSONResponse(
+                {"detail": "Rate limit exceeded, retry shortly"},
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
@@ -0,0 +1,160 @@
+"""Content-based scheme recommendations from hashed bag-of-words vectors."""
+import math
+import re
+import zlib
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is of on or the to with under scheme schemes".split()
+)
+
+# Relative weight of each scheme field in its vector
+FIELD_WEIGHTS = {"scheme_name": 2.0, "benefits": 1.5, "description": 1.0, "ministry": 1.0}
+
+
+def tokenize(text: str) -> list[str]:
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+def team_size_terms(team_size: int) -> list[str]:
+    """Map a head count onto the enterprise-size words schemes use"""
+    if team_size <= 10:
+        return ["micro", "startup"]
+    if team_size <= 50:
+        return ["small", "msme"]
+    if team_size <= 250:
+        return ["medium", "msme"]
+    return ["large", "enterprise"]
+
+
+class SchemeRecommender:
+    """Keeps one L2-normalised hashed feature row per scheme in a NumPy matrix.
+
+    Rows are added, replaced or cleared as schemes are written, so the matrix
+    never needs a rebuild. Scoring a profile against the whole catalogue is
+    a single matrix-vector product. The matrix is stored column-major and a
+    profile only has a handful of non-zero features, so the product reads
+    just those columns instead of the whole matrix. Document frequencies are
+    tracked per feature and applied as IDF weights on the query side.
+    """
+
+    def __init__(self, n_features: int = 512, initial_capacity: int = 1024):
+        self.n_features = n_features
+        self._matrix = np.zeros((initial_capacity, n_features), dtype=np.float32, order="F")
+        self._alive = np.zeros(initial_capacity, dtype=bool)
+        self._doc_freq = np.zeros(n_features, dtype=np.int64)
+        self._names: list[str | None] = []
+        self._rows: dict[str, int] = {}
+        self._free_rows: list[int] = []
+        # _id <-> name, for change-stream events that only carry the _id
+        self._names_by_id = {}
+        self._ids_by_name = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _vectorize(self, weighted_tokens) -> np.ndarray:
+        vector = np.zeros(self.n_features, dtype=np.float32)
+        for token, weight in weighted_tokens:
+            hashed = zlib.crc32(token.encode())
+            # Signed hashing keeps bucket collisions from only ever adding up
+            vector[hashed % self.n_features] += weight if hashed & 0x80000000 else -weight
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _scheme_tokens(self, scheme: dict):
+        for field, weight in FIELD_WEIGHTS.items():
+            value = scheme.get(field)
+            if not value:
+                continue
+            texts = value if isinstance(value, list) else [value]
+            for text in texts:
+                for token in tokenize(text):
+                    yield token, weight
+
+    def upsert(self, scheme: dict) -> None:
+        name = scheme["scheme_name"]
+        doc_id = scheme.get("_id")
+        if doc_id is not None:
+            previous_name = self._names_by_id.get(doc_id)
+            if previous_name is not None and previous_name != name:
+                self.remove(previous_name)
+            self._names_by_id[doc_id] = name
+            self._ids_by_name[name] = doc_id
+
+        row = self._rows.get(name)
+        if row is None:
+            row = self._allocate_row()
+            self._rows[name] = row
+            self._names[row] = name
+        else:
+            self._doc_freq -= self._matrix[row] != 0
+        vector = self._vectorize(self._scheme_tokens(scheme))
+        self._matrix[row] = vector
+        self._alive[row] = True
+        self._doc_freq += vector != 0
+
+    def remove(self, scheme_name: str) -> None:
+        doc_id = self._ids_by_name.pop(scheme_name, None)
+        if doc_id is not None:
+            self._names_by_id.pop(doc_id, None)
+        row = self._rows.pop(scheme_name, None)
+        if row is None:
+            return
+        self._doc_freq -= self._matrix[row] != 0
+        self._matrix[row] = 0
+        self._alive[row] = False
+        self._names[row] = None
+        self._free_rows.append(row)
+
+    def name_for_id(self, doc_id) -> str | None:
+        return self._names_by_id.get(doc_id)
+
+    def remove_id(self, doc_id) -> None:
+        scheme_name = self._names_by_id.get(doc_id)
+        if scheme_name is not None:
+            self.remove(scheme_name)
+
+    def _allocate_row(self) -> int:
+        if self._free_rows:
+            return self._free_rows.pop()
+        row = len(self._names)
+        if row == len(self._matrix):
+            # Grow geometrically so appends stay amortised O(1)
+            grown = np.zeros((len(self._matrix) * 2, self.n_features), dtype=np.float32, order="F")
+            grown[:row] = self._matrix
+            self._matrix = grown
+            alive = np.zeros(len(grown), dtype=bool)
+            alive[:row] = self._alive
+            self._alive = alive
+        self._names.append(None)
+        return row
+
+    def profile_vector(self, industry: str, stage: str | None, location: str | None, team_size: int | None,
+                       keywords: list[str] | None = None) -> np.ndarray:
+        tokens = [(token, 2.0) for token in tokenize(industry)]
+        for text in (stage, location, *(keywords or [])):
+            if text:
+                tokens.extend((token, 1.0) for token in tokenize(text))
+        if team_size is not None:
+            tokens.extend((term, 0.5) for term in team_size_terms(team_size))
+
+        vector = self._vectorize(tokens)
+        n_docs = len(self._rows)
+        idf = np.log((1 + n_docs) / (1 + self._doc_freq)).astype(np.float32) + 1
+        return vector * idf
+
+    def rank(self, query: np.ndarray, limit: int) -> list[tuple[str, float]]:
+        """Return the `limit` best (scheme_name, score) pairs, best first"""
+        used = len(self._names)
+        features = np.flatnonzero(query)
+        if not self._rows or not len(features):
+            return []
+        scores = self._matrix[:used, features] @ query[features]
+        scores[~self._alive[:used]] = -math.inf
+        limit = min(limit, len(self._rows))
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        return [(self._names[row], round(float(scores[row]), 4)) for row in top if scores[row] > 0]
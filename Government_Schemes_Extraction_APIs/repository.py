@@ -0,0 +1,425 @@
+"""Async data access for the schemes collection and its history."""
+import logging
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, TEXT, DeleteMany, IndexModel, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from metrics import REGISTRY, Counter
+
+logger = logging.getLogger(__name__)
+
+HISTORY_WRITE_ERRORS = REGISTRY.register(Counter(
+    "scheme_history_write_errors_total", "History entries lost after their write had committed."))
+
+# Indexes the service relies on; created (or verified) at startup
+SCHEME_INDEXES = [
+    IndexModel([("scheme_name", ASCENDING)], name="scheme_name_unique", unique=True),
+    IndexModel([("ministry", ASCENDING)], name="ministry"),
+    IndexModel([("benefits", ASCENDING)], name="benefits"),
+    # Backs /schemes/search; Mongo keeps it current on every write
+    IndexModel(
+        [("scheme_name", TEXT), ("description", TEXT), ("benefits", TEXT)],
+        name="scheme_text",
+        weights={"scheme_name": 10, "benefits": 3, "description": 1},
+    ),
+]
+
+# Backs point-in-time reads: newest entry for a name at or before a date
+HISTORY_INDEXES = [
+    IndexModel([("scheme_name", ASCENDING), ("valid_from", DESCENDING)], name="scheme_name_valid_from"),
+]
+
+# History operation recorded for each bulk_upsert status
+HISTORY_OPERATIONS = {"inserted": "insert", "updated": "update"}
+
+
+def repository_from_env(db) -> "SchemeRepository":
+    """The repository the API and the scraper CLI both write through.
+
+    COLLECTION_NAME names the schemes collection and HISTORY_COLLECTION_NAME
+    its history (default "<COLLECTION_NAME>_history"). MONGO_TRANSACTIONS=1
+    commits each write and its history entries together (needs a replica set).
+    """
+    collection_name = os.getenv("COLLECTION_NAME")
+    history_name = os.getenv("HISTORY_COLLECTION_NAME", f"{collection_name}_history")
+    transactions = os.getenv("MONGO_TRANSACTIONS", "0") == "1"
+    return SchemeRepository(db[collection_name], db[history_name], transactions)
+
+
+class SchemeRepository:
+    """Thin async wrapper around the schemes collection.
+
+    Takes a Motor collection, or anything exposing the same async API
+    (for example a mongomock_motor collection), so the routes can be run
+    against an in-process mock Mongo.
+
+    With a `history` collection, every mutation also appends the resulting
+    state (or a tombstone for deletes and renames) to it, so deletes are
+    soft: past states stay readable and deleted schemes restorable.
+    """
+
+    def __init__(self, collection, history=None, transactions: bool = False):
+        self.collection = collection
+        self.history = history
+        self.transactions = transactions
+
+    async def ping(self) -> None:
+        await self.collection.database.command("ping")
+
+    async def ensure_indexes(self) -> None:
+        """Create any missing indexes; a no-op for ones that already exist"""
+        await self.collection.create_indexes(SCHEME_INDEXES)
+        if self.history is not None:
+            await self.history.create_indexes(HISTORY_INDEXES)
+
+    async def index_status(self) -> dict:
+        """Report which of the expected indexes are present on the collections"""
+        status = await self._index_status(self.collection, SCHEME_INDEXES)
+        if self.history is not None:
+            status.update(await self._index_status(self.history, HISTORY_INDEXES))
+        return status
+
+    @staticmethod
+    async def _index_status(collection, models: list[IndexModel]) -> dict:
+        existing = await collection.index_information()
+        status = {}
+        for model in models:
+            spec = model.document
+            info = existing.get(spec["name"])
+            status[spec["name"]] = {
+                "keys": list(spec["key"].items()),
+                "unique": spec.get("unique", False),
+                "present": info is not None
+                and info.get("unique", False) == spec.get("unique", False)
+                # Text indexes are stored under internal _fts/_ftsx keys
+                and ("weights" in spec or list(info["key"]) == list(spec["key"].items())),
+            }
+        return status
+
+    def _page_cursor(self, after: ObjectId | None, limit: int | None, projection: dict | None = None):
+        query = {"_id": {"$gt": after}} if after else {}
+        # An inclusion projection still returns _id, which paging needs
+        cursor = self.collection.find(query, projection).sort("_id", 1)
+        if limit:
+            cursor = cursor.limit(limit)
+        return cursor
+
+    async def list_page(self, after: ObjectId | None, limit: int, projection: dict | None = None) -> list[dict]:
+        """Return up to `limit` raw documents (with _id) after the given _id"""
+        return await self._page_cursor(after, limit, projection).to_list(length=limit)
+
+    async def iter_schemes(self, after: ObjectId | None = None, limit: int | None = None, keep_id: bool = False,
+                           projection: dict | None = None):
+        """Yield documents one at a time from the cursor, without _id unless asked"""
+        async for doc in self._page_cursor(after, limit, projection):
+            if not keep_id:
+                doc.pop("_id", None)
+            yield doc
+
+    async def search(self, text: str | None, ministries: list[str] | None, limit: int) -> dict:
+        """Ranked full-text search with ministry facet counts, in one aggregation.
+
+        Facet counts cover every text match and ignore the ministry filter,
+        so clients can show how many results each other ministry would give.
+        """
+        ministry_match = {"ministry": {"$in": ministries}} if ministries else {}
+        if text:
+            # A computed field in $project would drop every other field, so
+            # the score is added as one and then sorted on
+            first_stage = [
+                {"$match": {"$text": {"$search": text}}},
+                {"$addFields": {"score": {"$meta": "textScore"}}},
+            ]
+            ranking = {"score": -1, "scheme_name": 1}
+        else:
+            first_stage = []
+            ranking = {"scheme_name": 1}
+
+        pipeline = first_stage + [
+            {"$facet": {
+                "results": [{"$match": ministry_match}, {"$sort": ranking}, {"$limit": limit}, {"$project": {"_id": 0}}],
+                "total": [{"$match": ministry_match}, {"$count": "count"}],
+                "ministries": [
+                    {"$group": {"_id": "$ministry", "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1, "_id": 1}},
+                ],
+            }}
+        ]
+        facets = (await self.collection.aggregate(pipeline).to_list(length=1))[0]
+        return {
+            "total": facets["total"][0]["count"] if facets["total"] else 0,
+            "results": facets["results"],
+            "facets": {"ministry": [{"value": item["_id"], "count": item["count"]} for item in facets["ministries"]]},
+        }
+
+    async def get(self, scheme_name: str, keep_id: bool = False) -> dict | None:
+        return await self.collection.find_one({"scheme_name": scheme_name}, None if keep_id else {"_id": 0})
+
+    async def get_many(self, scheme_names: list[str]) -> dict[str, dict]:
+        """Fetch several schemes in one query, keyed by name"""
+        cursor = self.collection.find({"scheme_name": {"$in": scheme_names}}, {"_id": 0})
+        return {doc["scheme_name"]: doc async for doc in cursor}
+
+    async def _write(self, operation):
+        """Run `operation(session)`, in a transaction when they are enabled.
+
+        Transactions make a mutation and its history entries commit
+        together (they need a replica set); otherwise the history write
+        follows the mutation on the same connection, and failing it only
+        loses the entry (see _recording).
+        """
+        if not self.transactions:
+            return await operation(None)
+        async with await self.collection.database.client.start_session() as session:
+            return await session.with_transaction(operation)
+
+    @asynccontextmanager
+    async def _recording(self, session):
+        """Wrap the steps that follow a write's mutation (reading back, history).
+
+        Outside a transaction the mutation has already committed by then,
+        so a Mongo error here is logged and counted rather than raised: the
+        caller must still see the write succeed and refresh its caches.
+        """
+        try:
+            yield
+        except PyMongoError:
+            if session is not None:
+                raise
+            HISTORY_WRITE_ERRORS.inc()
+            logger.exception("Recording scheme history failed after the write committed")
+
+    async def _record(self, entries: list[tuple[str, str, dict | None]], session) -> None:
+        """Append (operation, scheme_name, document or None) entries to the history"""
+        if self.history is None or not entries:
+            return
+        valid_from = datetime.now(timezone.utc)
+        async with self._recording(session):
+            await self.history.insert_many([
+                {
+                    "scheme_name": scheme_name,
+                    "valid_from": valid_from,
+                    "operation": operation,
+                    # None marks the name as not existing from valid_from on
+                    "scheme": {key: value for key, value in doc.items() if key != "_id"} if doc else None,
+                }
+                for operation, scheme_name, doc in entries
+            ], session=session)
+
+    def _changed(self, scheme_name: str, doc: dict, operation: str) -> list[tuple[str, str, dict | None]]:
+        entries = [(operation, doc["scheme_name"], doc)]
+        if doc["scheme_name"] != scheme_name:
+            entries.append(("rename", scheme_name, None))
+        return entries
+
+    async def insert(self, scheme_data: dict) -> None:
+        """Insert a scheme at version 1; raises DuplicateKeyError if the name is taken"""
+        doc = {**scheme_data, "version": 1}
+
+        async def operation(session):
+            # insert_one adds _id to the dict it is given, so pass a copy
+            await self.collection.insert_one(dict(doc), session=session)
+            await self._record([("insert", doc["scheme_name"], doc)], session)
+
+        await self._write(operation)
+
+    @staticmethod
+    def _versioned_filter(scheme_name: str, expected_version: int | None, expected_id: ObjectId | None) -> dict:
+        query = {"scheme_name": scheme_name}
+        if expected_id is not None:
+            # Versions restart at 1 when a name is deleted and reused
+            query["_id"] = expected_id
+        if expected_version is not None:
+            # Schemes written before versioning have no version field and count as 0
+            query["version"] = expected_version if expected_version else {"$in": [None, 0]}
+        return query
+
+    async def update(self, scheme_name: str, scheme_data: dict, expected_version: int | None = None,
+                     expected_id: ObjectId | None = None) -> bool:
+        """Replace a scheme's fields and bump its version.
+
+        With `expected_version` (and `expected_id`), only that document
+        still at that version matches.
+        """
+        return await self.patch(scheme_name, scheme_data, expected_version, expected_id) is not None
+
+    async def patch(self, scheme_name: str, fields: dict, expected_version: int | None = None,
+                    expected_id: ObjectId | None = None) -> dict | None:
+        """Set only the given fields and bump the version in one round trip.
+
+        Returns the updated document (with _id), or None if no scheme
+        matched the name, `expected_version` and `expected_id`.
+        """
+        async def operation(session):
+            doc = await self.collection.find_one_and_update(
+                self._versioned_filter(scheme_name, expected_version, expected_id),
+                {"$set": fields, "$inc": {"version": 1}},
+                return_document=ReturnDocument.AFTER,
+                session=session,
+            )
+            if doc is not None:
+                await self._record(self._changed(scheme_name, doc, "update"), session)
+            return doc
+
+        return await self._write(operation)
+
+    async def delete(self, scheme_name: str) -> bool:
+        async def operation(session):
+            doc = await self.collection.find_one_and_delete({"scheme_name": scheme_name}, session=session)
+            if doc is not None:
+                await self._record([("delete", scheme_name, None)], session)
+            return doc is not None
+
+        return await self._write(operation)
+
+    async def restore(self, scheme_name: str) -> dict | None:
+        """Re-insert the last recorded state of a deleted scheme.
+
+        Returns the restored document (with _id), or None if the history
+        has no earlier state for the name. Raises DuplicateKeyError if a
+        scheme with the name exists.
+        """
+        if self.history is None:
+            return None
+        entry = await self.history.find_one(
+            {"scheme_name": scheme_name, "scheme": {"$ne": None}}, sort=[("valid_from", DESCENDING)]
+        )
+        if entry is None:
+            return None
+        doc = {**entry["scheme"], "version": entry["scheme"].get("version", 0) + 1}
+
+        async def operation(session):
+            await self.collection.insert_one(doc, session=session)
+            await self._record([("restore", scheme_name, doc)], session)
+            return doc
+
+        return await self._write(operation)
+
+    async def get_as_of(self, scheme_name: str, as_of: datetime) -> dict | None:
+        """The scheme as it was at `as_of`, or None if it didn't exist then.
+
+        One index-bounded lookup: the newest history entry for the name at
+        or before `as_of`.
+        """
+        entry = await self.history.find_one(
+            {"scheme_name": scheme_name, "valid_from": {"$lte": as_of}},
+            sort=[("valid_from", DESCENDING)],
+        )
+        return entry["scheme"] if entry else None
+
+    async def backfill_history(self) -> int:
+        """Seed an empty history with the current schemes.
+
+        Each entry is dated from its document's ObjectId, the closest thing
+        to a creation time that existing documents carry.
+        """
+        if self.history is None or await self.history.estimated_document_count():
+            return 0
+        seeded = 0
+        batch = []
+        async for doc in self._page_cursor(None, None):
+            batch.append({
+                "scheme_name": doc["scheme_name"],
+                "valid_from": doc["_id"].generation_time,
+                "operation": "insert",
+                "scheme": {key: value for key, value in doc.items() if key != "_id"},
+            })
+            if len(batch) == 1000:
+                await self.history.insert_many(batch)
+                seeded += len(batch)
+                batch = []
+        if batch:
+            await self.history.insert_many(batch)
+            seeded += len(batch)
+        return seeded
+
+    async def compact_history(self, before: datetime) -> int:
+        """Drop history superseded before `before`; returns entries removed.
+
+        Per scheme, the newest entry at or before the cutoff is kept, since
+        it is still the state in effect at the cutoff, so reads as of any
+        later time stay exact. (A TTL index can't express "keep the latest".)
+        """
+        pipeline = [
+            {"$match": {"valid_from": {"$lte": before}}},
+            {"$group": {"_id": "$scheme_name", "latest": {"$max": "$valid_from"}, "entries": {"$sum": 1}}},
+            {"$match": {"entries": {"$gt": 1}}},
+        ]
+        removed = 0
+        ops = []
+        async for group in self.history.aggregate(pipeline):
+            ops.append(DeleteMany({"scheme_name": group["_id"], "valid_from": {"$lt": group["latest"]}}))
+            if len(ops) == 500:
+                removed += (await self.history.bulk_write(ops, ordered=False)).deleted_count
+                ops = []
+        if ops:
+            removed += (await self.history.bulk_write(ops, ordered=False)).deleted_count
+        return removed
+
+    def watch(self, resume_after: dict | None = None):
+        """Open a change stream on the collection (needs a replica set)"""
+        return self.collection.watch(full_document="updateLookup", resume_after=resume_after)
+
+    async def bulk_upsert(self, docs: list[dict], ordered: bool = True) -> list[dict]:
+        """Upsert documents keyed on scheme_name in a single bulk_write.
+
+        Returns one result per input document, in order, with a status of
+        "inserted", "updated", "error" or (ordered writes only) "skipped".
+        Inserted and updated results also carry the stored document (without
+        _id) as "scheme": the $set may not cover every field, so callers
+        refreshing in-process state must not use their input. In a
+        transaction any write error rolls back, and fails, the batch.
+        """
+        if not docs:
+            return []
+        ops = [
+            UpdateOne({"scheme_name": doc["scheme_name"]}, {"$set": doc, "$inc": {"version": 1}}, upsert=True)
+            for doc in docs
+        ]
+
+        async def operation(session):
+            errors = {}
+            try:
+                result = await self.collection.bulk_write(ops, ordered=ordered, session=session)
+                upserted = set(result.upserted_ids)
+            except BulkWriteError as exc:
+                if session is not None:
+                    raise
+                upserted = {item["index"] for item in exc.details.get("upserted", [])}
+                errors = {item["index"]: item["errmsg"] for item in exc.details.get("writeErrors", [])}
+
+            # An ordered bulk write stops at its first error
+            stop_at = min(errors) if ordered and errors else len(docs)
+            results = []
+            for index in range(len(docs)):
+                if index in errors:
+                    results.append({"status": "error", "error": errors[index]})
+                elif index > stop_at:
+                    results.append({"status": "skipped"})
+                else:
+                    results.append({"status": "inserted" if index in upserted else "updated"})
+
+            written = {
+                docs[index]["scheme_name"]: result["status"]
+                for index, result in enumerate(results) if result["status"] in ("inserted", "updated")
+            }
+            stored = {}
+            if written:
+                async with self._recording(session):
+                    cursor = self.collection.find({"scheme_name": {"$in": list(written)}}, {"_id": 0}, session=session)
+                    stored = {doc["scheme_name"]: doc async for doc in cursor}
+            await self._record([(HISTORY_OPERATIONS[written[name]], name, doc) for name, doc in stored.items()], session)
+            for doc, result in zip(docs, results):
+                if result["status"] in ("inserted", "updated") and doc["scheme_name"] in stored:
+                    result["scheme"] = stored[doc["scheme_name"]]
+            return results
+
+        try:
+            return await self._write(operation)
+        except BulkWriteError as exc:
+            error = exc.details.get("writeErrors", [{}])[0].get("errmsg", str(exc))
+            return [{"status": "error", "error": error} for _ in docs]
@@ -0,0 +1,256 @@
+"""Scrape government portals into the schemes collection.
+
+Portals are described in a JSON config of CSS selectors:
+
+    {"portals": [{
+        "name": "startup-india",
+        "start_urls": ["https://example.gov.in/schemes"],
+        "selectors": {"item": ".scheme-card", "name": "h3", "description": ".summary",
+                      "ministry": ".ministry", "benefits": ".benefits li", "next_page": "a.next"},
+        "max_pages": 50
+    }]}
+
+Pages are fetched with bounded concurrency and parsed in a process pool.
+Records whose content matches what is stored are skipped, and the rest are
+upserted in batches. Run once from the command line with
+`python scraper.py --config portals.json`, or let the API run it on a
+schedule by setting SCRAPER_CONFIG (see main.py).
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urljoin
+
+import httpx
+import orjson
+from bs4 import BeautifulSoup
+from pydantic import BaseModel
+
+from repository import SchemeRepository, repository_from_env
+
+logger = logging.getLogger(__name__)
+
+SCHEME_FIELDS = ("scheme_name", "description", "ministry", "benefits")
+USER_AGENT = "CampusFoundersSchemeBot/1.0 (+https://campus-founders.vercel.app/)"
+
+
+class PortalSelectors(BaseModel):
+    item: str
+    name: str
+    description: str
+    ministry: str | None = None
+    benefits: str | None = None
+    next_page: str | None = None
+
+
+class PortalConfig(BaseModel):
+    name: str
+    start_urls: list[str]
+    selectors: PortalSelectors
+    max_pages: int = 100
+
+
+def load_portals(path: str) -> list[PortalConfig]:
+    with open(path) as f:
+        return [PortalConfig.model_validate(portal) for portal in json.load(f)["portals"]]
+
+
+def _text(element) -> str | None:
+    if element is None:
+        return None
+    return " ".join(element.get_text(" ", strip=True).split()) or None
+
+
+def parse_portal_page(html: str, url: str, selectors: dict) -> tuple[list[dict], list[str]]:
+    """Extract scheme records and next-page links from one listing page.
+
+    Module-level and fed plain data so it can run in a worker process.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    records = []
+    for item in soup.select(selectors["item"]):
+        name = _text(item.select_one(selectors["name"]))
+        description = _text(item.select_one(selectors["description"]))
+        if not name or not description:
+            continue
+        ministry = _text(item.select_one(selectors["ministry"])) if selectors.get("ministry") else None
+        benefits = None
+        if selectors.get("benefits"):
+            benefits = [text for text in (_text(el) for el in item.select(selectors["benefits"])) if text] or None
+        records.append({"scheme_name": name, "description": description, "ministry": ministry, "benefits": benefits})
+
+    next_urls = []
+    if selectors.get("next_page"):
+        next_urls = [urljoin(url, link["href"]) for link in soup.select(selectors["next_page"]) if link.get("href")]
+    return records, next_urls
+
+
+def content_hash(scheme: dict) -> str:
+    canonical = orjson.dumps({field: scheme.get(field) for field in SCHEME_FIELDS}, option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(canonical).hexdigest()
+
+
+class SchemeService:
+    """Scrape portals and upsert the schemes that changed.
+
+    `client` may be any httpx.AsyncClient (e.g. one pointed at a local stand-in
+    serving saved pages). `on_write` is called with (stored document, status)
+    pairs after each batch so the API can refresh its in-process state.
+    `parse_workers=0` parses in the event loop instead of a process pool.
+    """
+
+    def __init__(self, repo: SchemeRepository, portals: list[PortalConfig], *, concurrency: int = 8,
+                 batch_size: int = 200, parse_workers: int | None = None, client: httpx.AsyncClient | None = None,
+                 on_write=None):
+        self.repo = repo
+        self.portals = portals
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.parse_workers = parse_workers
+        self.client = client
+        self.on_write = on_write
+
+    async def scrape_government_portals(self, stats: dict):
+        """Yield scheme records as pages are fetched and parsed"""
+        loop = asyncio.get_running_loop()
+        pages = asyncio.Queue()
+        records = asyncio.Queue(maxsize=self.batch_size * 2)
+        done = object()
+        seen = set()
+        page_counts = {}
+
+        def enqueue(portal: PortalConfig, url: str) -> None:
+            if url in seen or page_counts.get(portal.name, 0) >= portal.max_pages:
+                return
+            seen.add(url)
+            page_counts[portal.name] = page_counts.get(portal.name, 0) + 1
+            pages.put_nowait((portal, url))
+
+        client = self.client or httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+            timeout=httpx.Timeout(30.0),
+            follow_redirects=True,
+            headers={"User-Agent": USER_AGENT},
+        )
+        pool = ProcessPoolExecutor(self.parse_workers) if self.parse_workers != 0 else None
+
+        async def parse(html: str, url: str, selectors: dict):
+            if pool is None:
+                return parse_portal_page(html, url, selectors)
+            return await loop.run_in_executor(pool, parse_portal_page, html, url, selectors)
+
+        async def worker():
+            while True:
+                portal, url = await pages.get()
+                try:
+                    response = await client.get(url)
+                    response.raise_for_status()
+                    page_records, next_urls = await parse(response.text, url, portal.selectors.model_dump())
+                    stats["pages"] += 1
+                    for record in page_records:
+                        await records.put(record)
+                    for next_url in next_urls:
+                        enqueue(portal, next_url)
+                except httpx.HTTPError as exc:
+                    stats["page_errors"] += 1
+                    logger.warning("Fetching %s failed: %s", url, exc)
+                except Exception:
+                    # Parser errors, bad selectors, a broken process pool: one page
+                    # must not end the worker, or pages.join() would never return
+                    stats["page_errors"] += 1
+                    logger.exception("Scraping %s failed", url)
+                finally:
+                    pages.task_done()
+
+        async def finish():
+            await pages.join()
+            await records.put(done)
+
+        for portal in self.portals:
+            for url in portal.start_urls:
+                enqueue(portal, url)
+        tasks = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        tasks.append(asyncio.create_task(finish()))
+        try:
+            while (record := await records.get()) is not done:
+                stats["scraped"] += 1
+                yield record
+        finally:
+            for task in tasks:
+                task.cancel()
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+            if self.client is None:
+                await client.aclose()
+
+    async def _write_batch(self, batch: list[dict], stats: dict) -> None:
+        # A scheme listed twice in one batch keeps its last version
+        by_name = {record["scheme_name"]: record for record in batch}
+        stored = await self.repo.get_many(list(by_name))
+        changed = [
+            record for name, record in by_name.items()
+            if name not in stored or content_hash(stored[name]) != content_hash(record)
+        ]
+        stats["unchanged"] += len(by_name) - len(changed)
+        results = await self.repo.bulk_upsert(changed, ordered=False)
+        written = []
+        for result in results:
+            stats[result["status"]] = stats.get(result["status"], 0) + 1
+            # The stored document: a scraped record lacks fields such as eligibility_criteria
+            if "scheme" in result:
+                written.append((result["scheme"], result["status"]))
+        if written and self.on_write:
+            self.on_write(written)
+
+    async def update_scheme_database(self, records, stats: dict) -> None:
+        """Diff records against the stored schemes and upsert changes in batches"""
+        batch = []
+        async for record in records:
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                await self._write_batch(batch, stats)
+                batch = []
+        if batch:
+            await self._write_batch(batch, stats)
+
+    async def run(self) -> dict:
+        stats = {"pages": 0, "page_errors": 0, "scraped": 0, "unchanged": 0, "inserted": 0, "updated": 0}
+        await self.update_scheme_database(self.scrape_government_portals(stats), stats)
+        logger.info("Scrape finished: %s", stats)
+        return stats
+
+
+def main():
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    parser = argparse.ArgumentParser(description="Scrape government portals into the schemes collection")
+    parser.add_argument("--config", required=True, help="portal config JSON")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--parse-workers", type=int, default=None)
+    args = parser.parse_args()
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    async def run():
+        client = AsyncIOMotorClient(os.getenv("MONGO_URI"))
+        try:
+            # Configured like the API's, so CLI runs write history too
+            repo = repository_from_env(client[os.getenv("DB_NAME")])
+            service = SchemeService(repo, load_portals(args.config), concurrency=args.concurrency,
+                                    batch_size=args.batch_size, parse_workers=args.parse_workers)
+            return await service.run()
+        finally:
+            client.close()
+
+    print(json.dumps(asyncio.run(run()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
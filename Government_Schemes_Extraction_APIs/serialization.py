@@ -0,0 +1,31 @@
+"""orjson-backed JSON encoding for scheme responses."""
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+
+def _default(obj):
+    # Mongo documents are plain apart from the occasional ObjectId
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=_default)
+
+
+def dumps_line(doc: dict) -> bytes:
+    """Encode one document as an NDJSON line"""
+    return orjson.dumps(doc, default=_default, option=orjson.OPT_APPEND_NEWLINE)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson.
+
+    Routes that return this class directly skip FastAPI's jsonable_encoder
+    pass, which is most of the CPU cost for large pages of plain documents.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
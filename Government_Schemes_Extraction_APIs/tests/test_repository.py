@@ -0,0 +1,90 @@
+"""SchemeRepository against an in-process mongomock_motor collection.
+
+Run from Government_Schemes_Extraction_APIs/ with `python -m pytest tests`.
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from repository import SchemeRepository
+
+SCHEMES = [
+    {"scheme_name": "Startup India Seed Fund Scheme", "description": "Seed funding for startups",
+     "ministry": "Commerce", "benefits": ["Grant"]},
+    {"scheme_name": "Stand-Up India", "description": "Bank loans for new enterprises",
+     "ministry": "Finance", "benefits": ["Loan"]},
+    {"scheme_name": "Credit Guarantee Scheme for Startups", "description": "Guarantees on startup loans",
+     "ministry": "Commerce", "benefits": None},
+]
+
+
+class TextSearchCollection:
+    """A mongomock collection that accepts the $text stage search() sends.
+
+    mongomock has no text indexes, so a $text match becomes a
+    case-insensitive regex on the description and every match scores 1.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    def aggregate(self, pipeline):
+        return self.collection.aggregate([self._rewrite(stage) for stage in pipeline])
+
+    def _rewrite(self, value):
+        if isinstance(value, dict):
+            if "$text" in value:
+                return {"description": {"$regex": value["$text"]["$search"], "$options": "i"}}
+            if value == {"$meta": "textScore"}:
+                return {"$literal": 1.0}
+            return {key: self._rewrite(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._rewrite(item) for item in value]
+        return value
+
+
+def make_repo() -> SchemeRepository:
+    collection = mongomock_motor.AsyncMongoMockClient()["db"]["schemes"]
+    repo = SchemeRepository(TextSearchCollection(collection))
+
+    async def seed():
+        for scheme in SCHEMES:
+            await repo.insert(scheme)
+
+    asyncio.run(seed())
+    return repo
+
+
+def test_text_search_returns_whole_schemes_with_scores():
+    repo = make_repo()
+
+    found = asyncio.run(repo.search("startup", None, 10))
+
+    assert found["total"] == 2
+    assert [result["scheme_name"] for result in found["results"]] == [
+        "Credit Guarantee Scheme for Startups",
+        "Startup India Seed Fund Scheme",
+    ]
+    for result in found["results"]:
+        assert "_id" not in result
+        assert {"scheme_name", "description", "ministry", "benefits", "version", "score"} <= set(result)
+    assert found["facets"]["ministry"] == [{"value": "Commerce", "count": 2}]
+
+
+def test_ministry_filter_keeps_facets_over_every_match():
+    repo = make_repo()
+
+    found = asyncio.run(repo.search(None, ["Finance"], 10))
+
+    assert found["total"] == 1
+    assert found["results"] == [{**SCHEMES[1], "version": 1}]
+    assert found["facets"]["ministry"] == [{"value": "Commerce", "count": 2}, {"value": "Finance", "count": 1}]
@@ -0,0 +1,184 @@
+"""SchemeService against saved portal pages, served by an httpx.MockTransport.
+
+Run from Government_Schemes_Extraction_APIs/ with `python -m pytest tests`.
+"""
+import asyncio
+import os
+import sys
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper import PortalConfig, SchemeService
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "portal")
+BASE_URL = "https://portal.test"
+
+# Request path (with query) -> saved page
+PAGES = {
+    "/schemes": "schemes.html",
+    "/schemes?page=2": "schemes-page-2.html",
+}
+
+SELECTORS = {
+    "item": ".scheme-card",
+    "name": "h3",
+    "description": ".summary",
+    "ministry": ".ministry",
+    "benefits": ".benefits li",
+    "next_page": "a.next",
+}
+
+
+class InMemoryRepository:
+    """The part of SchemeRepository the scraper uses, over a dict"""
+
+    def __init__(self):
+        self.schemes = {}
+
+    async def get_many(self, scheme_names):
+        return {name: dict(self.schemes[name]) for name in scheme_names if name in self.schemes}
+
+    async def bulk_upsert(self, docs, ordered=True):
+        results = []
+        for doc in docs:
+            status = "updated" if doc["scheme_name"] in self.schemes else "inserted"
+            stored = {**self.schemes.get(doc["scheme_name"], {}), **doc}
+            stored["version"] = stored.get("version", 0) + 1
+            self.schemes[doc["scheme_name"]] = stored
+            results.append({"status": status, "scheme": dict(stored)})
+        return results
+
+
+def serve_fixtures(request: httpx.Request) -> httpx.Response:
+    page = PAGES.get(request.url.raw_path.decode())
+    if page is None:
+        return httpx.Response(404, text="Not found")
+    with open(os.path.join(FIXTURES, page)) as f:
+        return httpx.Response(200, text=f.read(), headers={"Content-Type": "text/html"})
+
+
+def portal(start_paths=("/schemes",), **overrides) -> PortalConfig:
+    return PortalConfig(
+        name="startup-portal",
+        start_urls=[BASE_URL + path for path in start_paths],
+        selectors={**SELECTORS, **overrides.pop("selectors", {})},
+        **overrides,
+    )
+
+
+def scrape(repo, portals, timeout: float = 10, **options) -> dict:
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(serve_fixtures)) as client:
+            service = SchemeService(repo, portals, client=client, **{"parse_workers": 0, **options})
+            # A stalled run fails the test instead of hanging it
+            return await asyncio.wait_for(service.run(), timeout)
+
+    return asyncio.run(run())
+
+
+def test_scrapes_every_page_of_a_portal():
+    repo = InMemoryRepository()
+    written = []
+
+    stats = scrape(repo, [portal()], on_write=written.extend)
+
+    assert stats["pages"] == 2
+    assert stats["page_errors"] == 0
+    # The card without a summary is skipped
+    assert stats["scraped"] == stats["inserted"] == 4
+    assert sorted(repo.schemes) == [
+        "Atal Innovation Mission",
+        "Credit Guarantee Scheme for Startups",
+        "Stand-Up India",
+        "Startup India Seed Fund Scheme",
+    ]
+    seed_fund = repo.schemes["Startup India Seed Fund Scheme"]
+    assert seed_fund["description"].startswith("Financial assistance to startups for proof of concept, prototype")
+    assert seed_fund["ministry"] == "Department for Promotion of Industry and Internal Trade"
+    assert seed_fund["benefits"] == ["Up to Rs 20 lakh grant", "Up to Rs 50 lakh debt"]
+    assert repo.schemes["Stand-Up India"]["benefits"] is None
+    assert sorted(status for _, status in written) == ["inserted"] * 4
+
+
+def test_unchanged_schemes_are_not_rewritten():
+    repo = InMemoryRepository()
+    scrape(repo, [portal()])
+    written = []
+
+    stats = scrape(repo, [portal()], on_write=written.extend)
+
+    assert stats["unchanged"] == 4
+    assert stats["inserted"] == stats["updated"] == 0
+    assert written == []
+
+
+def test_changed_schemes_are_updated():
+    repo = InMemoryRepository()
+    scrape(repo, [portal()])
+    repo.schemes["Stand-Up India"]["description"] = "An older description"
+
+    stats = scrape(repo, [portal()])
+
+    assert stats["updated"] == 1
+    assert stats["unchanged"] == 3
+    assert repo.schemes["Stand-Up India"]["description"].startswith("Bank loans for greenfield enterprises")
+
+
+def test_on_write_gets_the_stored_documents():
+    repo = InMemoryRepository()
+    scrape(repo, [portal()])
+    repo.schemes["Stand-Up India"]["description"] = "An older description"
+    repo.schemes["Stand-Up India"]["eligibility_criteria"] = {"sectors": ["manufacturing"]}
+    written = []
+
+    scrape(repo, [portal()], on_write=written.extend)
+
+    [(scheme, status)] = written
+    assert status == "updated"
+    # Fields the portal doesn't list survive the update and reach the API
+    assert scheme["eligibility_criteria"] == {"sectors": ["manufacturing"]}
+    assert scheme["version"] == 2
+
+
+def test_http_errors_are_counted_and_skipped():
+    repo = InMemoryRepository()
+
+    stats = scrape(repo, [portal(start_paths=("/missing", "/schemes"))])
+
+    assert stats["page_errors"] == 1
+    assert stats["pages"] == 2
+    assert stats["inserted"] == 4
+
+
+def test_max_pages_stops_pagination():
+    repo = InMemoryRepository()
+
+    stats = scrape(repo, [portal(max_pages=1)])
+
+    assert stats["pages"] == 1
+    assert "Atal Innovation Mission" not in repo.schemes
+
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+def test_a_failing_page_does_not_stall_the_run(concurrency):
+    repo = InMemoryRepository()
+    # soupsieve rejects the selector while parsing every page
+    broken = portal(start_paths=("/schemes", "/schemes?page=2"), selectors={"name": "h3["})
+
+    stats = scrape(repo, [broken], concurrency=concurrency)
+
+    assert stats["page_errors"] == 2
+    assert stats["pages"] == 0
+    assert repo.schemes == {}
+
+
+def test_parses_in_a_process_pool():
+    repo = InMemoryRepository()
+
+    stats = scrape(repo, [portal()], parse_workers=1, timeout=30)
+
+    assert stats["pages"] == 2
+    assert stats["inserted"] == 4
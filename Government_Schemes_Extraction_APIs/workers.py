@@ -0,0 +1,17 @@
+"""Gunicorn worker class for the schemes API (see gunicorn.conf.py)."""
+from uvicorn_worker import UvicornWorker
+
+
+class SchemesWorker(UvicornWorker):
+    """UvicornWorker that bounds its own drain on shutdown.
+
+    Plain UvicornWorker waits indefinitely for in-flight requests. A stuck
+    one would then hold the worker until the master kills it at
+    graceful_timeout, and the app's lifespan shutdown (cancelling background
+    tasks, closing the Mongo client) would never run. Cancelling leftovers a
+    few seconds earlier leaves time for it.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.config.timeout_graceful_shutdown = max(self.cfg.graceful_timeout - 5, 1)
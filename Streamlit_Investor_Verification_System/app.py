@@ -4,12 +4,23 @@ import numpy as np
 import os
 import uuid
 import json
-import re
-import base64
 import requests
 from datetime import datetime
 from PIL import Image
 
+from investor_store import open_store
+from investor_export import EXPORT_FORMATS, export_investors
+from id_validation import validate_id
+from bulk_onboarding import FILE_TYPES, onboard_chunk, read_chunks, template_csv
+from verification_rules import (
+    accreditation_reasons,
+    aml_risk_factors,
+    bank_checks,
+    check_accreditation,
+    check_bank_details,
+    screen_aml,
+)
+
 # Set page configuration
 st.set_page_config(
     page_title="Investor Verification System",
@@ -25,9 +36,14 @@ try:
 except:
     pass  # Skip directory creation on Streamlit Cloud
 
-# Define a simple database (in a real app, you would use a proper database)
-if 'verified_investors' not in st.session_state:
-    st.session_state.verified_investors = []
+# Completed investors are kept in a persistent store shared by every session
+# (SQLite by default; point INVESTOR_STORE_URL elsewhere to swap it)
+INVESTOR_STORE_URL = os.getenv("INVESTOR_STORE_URL", "sqlite:///investors.db")
+
+@st.cache_resource
+def get_investor_store():
+    """Open the investor store once per server process"""
+    return open_store(INVESTOR_STORE_URL)
 
 if 'current_investor' not in st.session_state:
     st.session_state.current_investor = {
@@ -63,95 +79,46 @@ def mock_face_verification(id_file, selfie_file):
     return False, "Missing files for verification"
 
 def check_id_validity(id_number, id_type):
-    """Basic ID validation based on patterns"""
-    if id_type == "Aadhar Card (India)":
-        # Aadhar has 12 digits
-        return bool(re.match(r'^\d{12}$', id_number)), "Valid Aadhar format" if re.match(r'^\d{12}$', id_number) else "Invalid Aadhar format"
-    elif id_type == "PAN Card (India)":
-        # PAN has 10 characters (5 letters, 4 numbers, 1 letter)
-        return bool(re.match(r'^[A-Z]{5}[0-9]{4}[A-Z]$', id_number)), "Valid PAN format" if re.match(r'^[A-Z]{5}[0-9]{4}[A-Z]$', id_number) else "Invalid PAN format"
-    elif id_type == "Passport":
-        # Basic passport format check (varies by country)
-        return bool(re.match(r'^[A-Z0-9]{8,12}$', id_number)), "Valid Passport format" if re.match(r'^[A-Z0-9]{8,12}$', id_number) else "Invalid Passport format"
-    return True, "Format check not available for this ID type"
+    """ID validation based on patterns and check digits (see id_validation.ID_RULES)"""
+    return validate_id(id_number, id_type)
 
 def mock_aml_check(investor_data):
     """Mock AML check - in a real application, you'd use a proper AML API"""
     # This is a simulation - NEVER rely on this for real AML checks
-    high_risk_names = ["John Doe", "Jane Smith", "Vladimir Putin", "Kim Jong Un"]
-    high_risk_countries = ["North Korea", "Iran", "Syria"]
-    
-    name = f"{investor_data.get('first_name', '')} {investor_data.get('last_name', '')}"
-    country = investor_data.get('country', '')
-    
-    risks = []
-    if any(name.lower() in high_name.lower() for high_name in high_risk_names):
-        risks.append("Potential match on PEP/Sanctions list")
-    
-    if country in high_risk_countries:
-        risks.append(f"High-risk jurisdiction: {country}")
-    
-    risk_score = len(risks) * 33 if risks else np.random.randint(5, 20)
+    investor = {
+        "first_name": investor_data.get('first_name', ''),
+        "last_name": investor_data.get('last_name', ''),
+        "country": investor_data.get('country', '')
+    }
+    result = screen_aml(investor["first_name"], investor["last_name"], investor["country"])
     
     return {
-        "passed": risk_score < 50,
-        "risk_score": risk_score,
-        "risk_factors": risks if risks else ["No significant risk factors identified"],
+        "passed": result["passed"],
+        "risk_score": result["risk_score"],
+        "risk_factors": aml_risk_factors({**investor, **result}),
         "timestamp": datetime.now().isoformat()
     }
 
 def verify_accreditation(income, net_worth, investment_experience):
     """Verify if investor meets accreditation requirements"""
     # This is a simplified version - real accreditation has specific legal requirements
-    meets_criteria = False
-    reasons = []
-    
-    if income >= 200000:
-        meets_criteria = True
-        reasons.append(f"Annual income of ${income:,} meets minimum requirement")
-    
-    if net_worth >= 1000000:
-        meets_criteria = True
-        reasons.append(f"Net worth of ${net_worth:,} meets minimum requirement")
-    
-    if investment_experience >= 5 and (income >= 100000 or net_worth >= 500000):
-        meets_criteria = True
-        reasons.append(f"{investment_experience} years of investment experience with sufficient financial backing")
-    
-    if not meets_criteria:
-        reasons = ["Does not meet any accreditation criteria"]
+    result = check_accreditation(income, net_worth, investment_experience)
+    investor = {"annual_income": income, "net_worth": net_worth, "investment_experience": investment_experience}
     
     return {
-        "accredited": meets_criteria,
-        "reasons": reasons,
+        "accredited": result["accredited"],
+        "reasons": accreditation_reasons({**investor, **result}),
         "timestamp": datetime.now().isoformat()
     }
 
 def validate_bank_details(account_number, routing_number, bank_name):
     """Basic validation of bank details"""
     # In a real application, you would use an API like Plaid for verification
-    
-    # Basic format checks
-    account_valid = bool(re.match(r'^\d{10,17}$', account_number))
-    routing_valid = bool(re.match(r'^\d{9}$', routing_number)) if routing_number else True
-    
-    checks = []
-    if account_valid:
-        checks.append("Account number format is valid")
-    else:
-        checks.append("Account number format is invalid")
-        
-    if routing_valid:
-        checks.append("Routing number format is valid")
-    else:
-        checks.append("Routing number format is invalid")
-    
-    if bank_name:
-        checks.append(f"Bank name provided: {bank_name}")
+    result = check_bank_details(account_number, routing_number, bank_name)
     
     return {
-        "valid": account_valid and routing_valid and bool(bank_name),
-        "checks": checks,
+        "valid": result["valid"],
+        "checks": bank_checks({**result, "bank_name": bank_name}),
         "timestamp": datetime.now().isoformat()
     }
 
@@ -162,7 +129,7 @@ def main():
     
     # Sidebar for navigation
     st.sidebar.title("Navigation")
-    page = st.sidebar.radio("Go to", ["Home", "KYC Verification", "Accreditation Check", "AML Screening", "Proof of Funds", "Verification Status", "Admin Dashboard"])
+    page = st.sidebar.radio("Go to", ["Home", "KYC Verification", "Accreditation Check", "AML Screening", "Proof of Funds", "Verification Status", "Bulk Onboarding", "Admin Dashboard"])
     
     if page == "Home":
         home_page()
@@ -176,6 +143,8 @@ def main():
         proof_of_funds_page()
     elif page == "Verification Status":
         verification_status_page()
+    elif page == "Bulk Onboarding":
+        bulk_onboarding_page()
     elif page == "Admin Dashboard":
         admin_dashboard()
 
@@ -558,7 +527,9 @@ def verification_status_page():
             # In a real application, this would trigger final processing and database updates
             investor['status'] = 'complete'
             investor['completion_date'] = datetime.now().isoformat()
-            st.session_state.verified_investors.append(investor.copy())
+            get_investor_store().save(investor)
+            investor_stats.clear()
+            investor_countries.clear()
             
             # Reset current investor
             st.session_state.current_investor = {
@@ -570,9 +541,137 @@ def verification_status_page():
                 'funds_status': 'incomplete'
             }
             
-            st.success("Verification process completed and recorded! You can start a new verification from the Home page.")
+            st.success(f"Verification process completed and recorded (reference: {investor['id']})! You can start a new verification from the Home page.")
             st.balloons()
 
+    # Look up an earlier, completed verification
+    with st.expander("Check a completed verification"):
+        reference = st.text_input("Verification reference")
+        if reference:
+            record = get_investor_store().get(reference.strip())
+            if record and record.get('status') != 'complete':
+                st.warning("⚠️ This verification is not complete yet: it is awaiting manual review.")
+            elif record:
+                st.success(f"✅ Completed on {record.get('completion_date', 'N/A')} for {record.get('first_name', 'N/A')} {record.get('last_name', 'N/A')}")
+            else:
+                st.error("No completed verification found with this reference.")
+
+def bulk_onboarding_page():
+    st.header("Bulk Investor Onboarding")
+    
+    # Imports write straight to the investor store, so they sit behind the admin password too
+    admin_password = st.text_input("Admin Password", type="password")
+    if admin_password != "admin123":  # Never use hardcoded passwords in real applications
+        st.error("Please enter the correct admin password to import investors.")
+        return
+    
+    st.write("""
+    Onboard a whole syndicate at once by uploading a CSV or Excel file with one investor per row.
+    Every row goes through the same ID, accreditation, AML and bank detail checks as the individual pages:
+    - Rows that pass every check are recorded as complete verifications.
+    - Rows that fail accreditation, AML or bank checks are recorded as incomplete, for manual review.
+    - Rows with missing or invalid details are not recorded and are listed in the report.
+    """)
+    st.download_button("Download CSV Template", template_csv(), file_name="investor_template.csv", mime="text/csv")
+    
+    uploaded_file = st.file_uploader("Investor File", type=FILE_TYPES)
+    
+    if uploaded_file and st.button("Import Investors"):
+        store = get_investor_store()
+        progress = st.progress(0.0, text="Starting import...")
+        counts = {"imported": 0, "needs review": 0, "rejected": 0}
+        issues = []
+        error = None
+        try:
+            # The file is processed chunk by chunk, each saved before the next is read
+            for chunk, done in read_chunks(uploaded_file, uploaded_file.name):
+                investors, report = onboard_chunk(chunk)
+                store.save_many(investors)
+                for outcome, count in report["outcome"].value_counts().items():
+                    counts[outcome] += int(count)
+                issues.append(report[report["outcome"] != "imported"])
+                progress.progress(done, text=f"Processed {sum(counts.values()):,} rows")
+        except Exception as e:
+            error = str(e)
+        finally:
+            investor_stats.clear()
+            investor_countries.clear()
+        
+        # Kept in the session so the results survive the rerun of downloading the report
+        st.session_state.bulk_import = {
+            "file_name": uploaded_file.name,
+            "counts": counts,
+            "issues": pd.concat(issues) if issues else pd.DataFrame(columns=["line", "outcome", "investor_id", "issues"]),
+            "error": error,
+        }
+    
+    result = st.session_state.get("bulk_import")
+    if result:
+        st.subheader(f"Import Results: {result['file_name']}")
+        if result["error"]:
+            st.error(f"The import stopped early: {result['error']}. Rows processed before that were recorded.")
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Imported", f"{result['counts']['imported']:,}")
+        with col2:
+            st.metric("Needs Review", f"{result['counts']['needs review']:,}")
+        with col3:
+            st.metric("Rejected", f"{result['counts']['rejected']:,}")
+        
+        if len(result["issues"]):
+            st.write("Rows with issues (line numbers refer to the uploaded file):")
+            st.dataframe(result["issues"], hide_index=True)
+            st.download_button(
+                "Download Error Report",
+                result["issues"].to_csv(index=False),
+                file_name="onboarding_report.csv",
+                mime="text/csv",
+            )
+        elif not result["error"]:
+            st.success("Every row was imported and fully verified.")
+
+@st.cache_data(ttl=60)
+def investor_stats():
+    """System Statistics totals; cleared whenever an investor is completed"""
+    return get_investor_store().stats()
+
+@st.cache_data(ttl=60)
+def investor_countries():
+    return get_investor_store().countries()
+
+def investor_table(rows):
+    """Build the dashboard table from store rows in one vectorized pass"""
+    df = pd.DataFrame(rows, columns=["id", "first_name", "last_name", "country", "kyc_status", "accreditation_status",
+                                     "aml_status", "funds_status", "investment_amount", "completion_date"])
+    return pd.DataFrame({
+        "ID": df["id"],
+        "Name": df["first_name"].fillna("N/A") + " " + df["last_name"].fillna("N/A"),
+        "Country": df["country"].fillna("N/A"),
+        "KYC": df["kyc_status"].fillna("N/A"),
+        "Accredited": df["accreditation_status"].fillna("N/A"),
+        "AML": df["aml_status"].fillna("N/A"),
+        "Funds": df["funds_status"].fillna("N/A"),
+        "Investment": "$" + df["investment_amount"].fillna(0).map("{:,.0f}".format),
+        "Completion Date": df["completion_date"].fillna("N/A"),
+    })
+
+# Sort options for the investor table, mapped to store columns
+SORT_OPTIONS = {
+    "Completion Date": "completion_date",
+    "Name": "last_name",
+    "Country": "country",
+    "Investment": "investment_amount",
+    "Accreditation": "accreditation_status",
+    "AML": "aml_status",
+}
+
+# Investor table views; bulk-imported investors that failed a check wait for review as "incomplete"
+STATUS_OPTIONS = {
+    "Completed": "complete",
+    "Awaiting Review": "incomplete",
+}
+
 def admin_dashboard():
     st.header("Admin Dashboard")
     
@@ -584,33 +683,66 @@ def admin_dashboard():
     
     st.subheader("Verified Investors")
     
-    if not st.session_state.verified_investors:
+    store = get_investor_store()
+    stats = investor_stats()
+    
+    if not store.count():
         st.info("No verified investors yet.")
     else:
-        # Create a dataframe for display
-        investor_data = []
-        for investor in st.session_state.verified_investors:
-            investor_data.append({
-                "ID": investor['id'],
-                "Name": f"{investor.get('first_name', 'N/A')} {investor.get('last_name', 'N/A')}",
-                "Country": investor.get('country', 'N/A'),
-                "KYC": investor.get('kyc_status', 'N/A'),
-                "Accredited": investor.get('accreditation_status', 'N/A'),
-                "AML": investor.get('aml_status', 'N/A'),
-                "Funds": investor.get('funds_status', 'N/A'),
-                "Investment": f"${investor.get('investment_amount', 0):,}",
-                "Completion Date": investor.get('completion_date', 'N/A')
-            })
+        # Filtering, sorting and paging all run in the store; only one page is loaded
+        col1, col2, col3, col4, col5 = st.columns(5)
+        with col1:
+            status = st.selectbox("Status", list(STATUS_OPTIONS))
+        with col2:
+            countries = st.multiselect("Country", investor_countries())
+        with col3:
+            accreditation = st.selectbox("Accreditation", ["All", "verified", "rejected"])
+        with col4:
+            aml = st.selectbox("AML", ["All", "verified", "flagged"])
+        with col5:
+            name = st.text_input("Name contains")
+        
+        filters = {
+            "status": STATUS_OPTIONS[status],
+            "country": countries,
+            "accreditation_status": None if accreditation == "All" else accreditation,
+            "aml_status": None if aml == "All" else aml,
+            "name": name.strip(),
+        }
+        matching = store.count(filters)
         
-        df = pd.DataFrame(investor_data)
-        st.dataframe(df)
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            sort_label = st.selectbox("Sort by", list(SORT_OPTIONS))
+        with col2:
+            descending = st.radio("Order", ["Descending", "Ascending"], horizontal=True) == "Descending"
+        with col3:
+            page_size = st.selectbox("Rows per page", [25, 50, 100, 250], index=1)
+        with col4:
+            page_count = max(1, -(-matching // page_size))
+            page_number = st.number_input("Page", min_value=1, max_value=page_count, value=1)
+        
+        rows = store.page(filters, SORT_OPTIONS[sort_label], descending, page_size, (page_number - 1) * page_size)
+        if rows:
+            first = (page_number - 1) * page_size + 1
+            st.caption(f"Showing {first:,}–{first + len(rows) - 1:,} of {matching:,} matching investors")
+            st.dataframe(investor_table(rows), hide_index=True)
+        else:
+            st.info("No investors match these filters.")
         
-        # Export options
-        if st.button("Export Investor Data (CSV)"):
-            csv = df.to_csv(index=False)
-            b64 = base64.b64encode(csv.encode()).decode()
-            href = f'<a href="data:file/csv;base64,{b64}" download="investor_data.csv">Download CSV File</a>'
-            st.markdown(href, unsafe_allow_html=True)
+        # Export the matching investors; the file is only built once the button is clicked
+        col1, col2 = st.columns([1, 3])
+        with col1:
+            file_format = st.selectbox("Export format", list(EXPORT_FORMATS))
+        extension, mime = EXPORT_FORMATS[file_format][1:]
+        with col2:
+            st.download_button(
+                f"Export {matching:,} Investors ({file_format})",
+                data=lambda: export_investors(store, file_format, filters),
+                file_name=f"investor_data.{extension}",
+                mime=mime,
+                disabled=not matching,
+            )
     
     # System statistics
     st.subheader("System Statistics")
@@ -618,19 +750,16 @@ def admin_dashboard():
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Investors", len(st.session_state.verified_investors))
+        st.metric("Total Investors", stats["investors"])
     
     with col2:
-        accredited = sum(1 for inv in st.session_state.verified_investors if inv.get('accreditation_status') == 'verified')
-        st.metric("Accredited Investors", accredited)
+        st.metric("Accredited Investors", stats["accredited"])
     
     with col3:
-        total_investment = sum(inv.get('investment_amount', 0) for inv in st.session_state.verified_investors)
-        st.metric("Total Investment", f"${total_investment:,}")
+        st.metric("Total Investment", f"${stats['total_investment']:,.0f}")
     
     with col4:
-        aml_flagged = sum(1 for inv in st.session_state.verified_investors if inv.get('aml_status') == 'flagged')
-        st.metric("AML Flagged", aml_flagged)
+        st.metric("AML Flagged", stats["aml_flagged"])
 
 # Run the app
 if __name__ == "__main__":
@@ -0,0 +1,88 @@
+"""Compare per-row ID validation cost: a loop over validate_id vs validate_ids.
+
+Usage (from Streamlit_Investor_Verification_System/):
+    python benchmarks/bench_id_validation.py [--sizes 10000 100000 1000000] [--repeat 3] [--json]
+
+Rows are a mix of Aadhaar numbers (about a tenth with a correct Verhoeff
+check digit), PANs, passports and an unchecked ID type. The loop is only
+timed up to --loop-limit rows and scaled, as it is linear.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from id_validation import validate_id, validate_ids
+
+ID_TYPES = ["Aadhar Card (India)", "PAN Card (India)", "Passport", "National ID"]
+LETTERS = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+
+
+def make_ids(size: int, seed: int = 42) -> tuple[pd.Series, pd.Series]:
+    rng = np.random.default_rng(seed)
+    types = pd.Series(rng.choice(ID_TYPES, size, p=[0.5, 0.3, 0.15, 0.05]))
+    aadhaar = pd.Series(rng.integers(2 * 10**11, 10**12, size).astype(str))
+    pan = pd.Series(
+        ["".join(letters) for letters in rng.choice(LETTERS, (size, 5))]
+    ) + pd.Series(rng.integers(1000, 10000, size).astype(str)) + pd.Series(rng.choice(LETTERS, size))
+    passport = pd.Series(rng.integers(10**7, 10**9, size).astype(str)).radd("P")
+    numbers = aadhaar.where(types == ID_TYPES[0], pan.where(types == ID_TYPES[1], passport))
+    return numbers, types
+
+
+def best_time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run(sizes: list[int], repeat: int, loop_limit: int) -> list[dict]:
+    rows = []
+    for size in sizes:
+        numbers, types = make_ids(size)
+        sample = min(size, loop_limit)
+        pairs = list(zip(numbers[:sample], types[:sample]))
+        loop_seconds = best_time(lambda: [validate_id(number, id_type) for number, id_type in pairs], repeat)
+        batch_seconds = best_time(lambda: validate_ids(numbers, types), repeat)
+        loop_ns = loop_seconds / sample * 1e9
+        batch_ns = batch_seconds / size * 1e9
+        rows.append({
+            "rows": size,
+            "loop_ns_row": round(loop_ns),
+            "batch_ns_row": round(batch_ns),
+            "batch_ms": round(batch_seconds * 1000, 1),
+            "speedup": round(loop_ns / batch_ns, 1),
+            "valid_rows": int(validate_ids(numbers, types)["valid"].sum()),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--loop-limit", type=int, default=100_000)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    rows = run(args.sizes, args.repeat, args.loop_limit)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    columns = list(rows[0])
+    print(" ".join(f"{column:>12}" for column in columns))
+    for row in rows:
+        print(" ".join(f"{str(row[column]):>12}" for column in columns))
+
+
+if __name__ == "__main__":
+    main()
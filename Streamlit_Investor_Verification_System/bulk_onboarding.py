@@ -0,0 +1,217 @@
+"""Bulk investor onboarding from an uploaded CSV or Excel file.
+
+The file is read in chunks. Each chunk goes through column-wise versions of
+the checks the single-investor pages run (validate_ids and the *_many
+rules in verification_rules), and
+the rows that pass input validation become investor records for the
+store. Every other row is reported with its reasons, so a chunk never
+needs more than its own rows in memory.
+"""
+import uuid
+from datetime import datetime
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from id_validation import validate_ids
+from verification_rules import (
+    accreditation_reasons,
+    aml_check_many,
+    aml_risk_factors,
+    bank_checks,
+    validate_bank_details_many,
+    verify_accreditation_many,
+    whole_number,
+)
+
+try:
+    import openpyxl
+except ImportError:  # Excel uploads are accepted only when openpyxl is installed
+    openpyxl = None
+
+REQUIRED_COLUMNS = [
+    "first_name", "last_name", "email", "country", "id_type", "id_number",
+    "annual_income", "net_worth", "investment_experience",
+    "bank_name", "account_number", "investment_amount",
+]
+OPTIONAL_COLUMNS = ["dob", "phone", "address", "routing_number"]
+NUMERIC_COLUMNS = ["annual_income", "net_worth", "investment_experience", "investment_amount"]
+
+FILE_TYPES = ["csv", "xlsx"] if openpyxl is not None else ["csv"]
+CHUNK_SIZE = 2000
+
+
+def template_csv():
+    """Header row of a file bulk onboarding accepts"""
+    return ",".join(REQUIRED_COLUMNS + OPTIONAL_COLUMNS) + "\n"
+
+
+def read_chunks(file, file_name, chunk_size=CHUNK_SIZE):
+    """Yield (chunk, fraction of the file read) for an uploaded CSV or Excel file.
+
+    Every cell is read as a stripped string ("" when empty), and the index
+    is the row's line number in the file.
+    """
+    if file_name.lower().endswith(".xlsx"):
+        chunks = _excel_chunks(file, chunk_size)
+    else:
+        chunks = _csv_chunks(file, chunk_size)
+    for chunk, progress in chunks:
+        chunk.columns = [str(column).strip().lower().replace(" ", "_") for column in chunk.columns]
+        missing = [column for column in REQUIRED_COLUMNS if column not in chunk.columns]
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(missing)}")
+        for column in OPTIONAL_COLUMNS:
+            if column not in chunk.columns:
+                chunk[column] = ""
+        chunk = chunk[REQUIRED_COLUMNS + OPTIONAL_COLUMNS]
+        yield chunk.apply(lambda column: column.str.strip()), progress
+
+
+def _csv_chunks(file, chunk_size):
+    size = file.seek(0, 2) or 1
+    file.seek(0)
+    for chunk in pd.read_csv(file, dtype=str, keep_default_na=False, chunksize=chunk_size):
+        # Header is line 1
+        chunk.index += 2
+        yield chunk, min(file.tell() / size, 1.0)
+
+
+def _cell_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        # Numeric cells holding IDs or account numbers
+        return str(int(value))
+    return str(value)
+
+
+def _excel_chunks(file, chunk_size):
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        sheet = workbook.active
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None) or []
+        total = max((sheet.max_row or 1) - 1, 1)
+        line = 2
+        while batch := list(islice(rows, chunk_size)):
+            chunk = pd.DataFrame(
+                [[_cell_text(value) for value in row] for row in batch],
+                columns=header,
+                index=range(line, line + len(batch)),
+                dtype=str,
+            )
+            line += len(batch)
+            yield chunk, min((line - 2) / total, 1.0)
+    finally:
+        workbook.close()
+
+
+def _append(issues, rows, message):
+    """Add message (a string or a Series) to the issues of the selected rows"""
+    return issues.mask(rows, issues + message + "; ")
+
+
+def input_errors(chunk, numbers, ids):
+    """Reasons each row can't be onboarded at all, as "; "-joined strings"""
+    issues = pd.Series("", index=chunk.index)
+    for column in REQUIRED_COLUMNS:
+        if column not in NUMERIC_COLUMNS:
+            issues = _append(issues, chunk[column] == "", f"Missing {column}")
+    for column in NUMERIC_COLUMNS:
+        issues = _append(issues, numbers[column].isna() | (numbers[column] < 0), f"Invalid {column}")
+    issues = _append(issues, numbers["investment_amount"] == 0, "Investment amount must be above 0")
+    issues = _append(
+        issues, (numbers["annual_income"] <= 0) & (numbers["net_worth"] <= 0), "Provide annual income or net worth"
+    )
+    issues = _append(issues, ~ids["valid"] & (chunk["id_number"] != ""), ids["message"])
+    return issues.str.removesuffix("; ")
+
+
+def onboard_chunk(chunk, rng=None):
+    """Run every check over a chunk from read_chunks.
+
+    Returns the investor records to save, shaped like the ones the
+    single-investor pages build, and a report with one row per input row:
+    its line, outcome ("imported", "needs review" or "rejected"), investor
+    id and issues. Rows that pass every check are complete; rows that only
+    fail accreditation, AML or bank checks are saved as incomplete, for review.
+    """
+    now = datetime.now().isoformat()
+    numbers = chunk[NUMERIC_COLUMNS].apply(pd.to_numeric, errors="coerce")
+    ids = validate_ids(chunk["id_number"], chunk["id_type"])
+    errors = input_errors(chunk, numbers, ids)
+
+    accreditation = verify_accreditation_many(
+        numbers["annual_income"], numbers["net_worth"], numbers["investment_experience"]
+    )
+    aml = aml_check_many(chunk["first_name"], chunk["last_name"], chunk["country"], rng)
+    bank = validate_bank_details_many(chunk["account_number"], chunk["routing_number"], chunk["bank_name"])
+
+    review = pd.Series("", index=chunk.index)
+    review = _append(review, ~accreditation["accredited"], "Does not meet accreditation criteria")
+    review = _append(review, ~aml["passed"], "AML risk score " + aml["risk_score"].astype(str))
+    review = _append(review, ~bank["account_valid"], "Account number format is invalid")
+    review = _append(review, ~bank["routing_valid"], "Routing number format is invalid")
+    review = review.str.removesuffix("; ")
+
+    accepted = (errors == "").to_numpy()
+    rows = pd.concat(
+        [chunk.drop(columns=NUMERIC_COLUMNS), numbers, accreditation, aml.drop(columns="passed"), bank.drop(columns="valid")],
+        axis=1,
+    )[accepted]
+    rows["aml_passed"] = aml["passed"][accepted]
+    rows["bank_valid"] = bank["valid"][accepted]
+
+    investors = []
+    for row in rows.itertuples():
+        values = row._asdict()
+        investor = {
+            "id": str(uuid.uuid4()),
+            "first_name": row.first_name,
+            "last_name": row.last_name,
+            "dob": row.dob or None,
+            "email": row.email,
+            "phone": row.phone or None,
+            "country": row.country,
+            "address": row.address or None,
+            "id_type": row.id_type,
+            "id_number": row.id_number,
+            "kyc_status": "verified",
+            "kyc_timestamp": now,
+            "annual_income": whole_number(row.annual_income),
+            "net_worth": whole_number(row.net_worth),
+            "investment_experience": whole_number(row.investment_experience),
+            "accreditation_status": "verified" if row.accredited else "rejected",
+            "accreditation_details": {"accredited": bool(row.accredited), "reasons": accreditation_reasons(values), "timestamp": now},
+            "aml_status": "verified" if row.aml_passed else "flagged",
+            "aml_details": {
+                "passed": bool(row.aml_passed),
+                "risk_score": int(row.risk_score),
+                "risk_factors": aml_risk_factors(values),
+                "timestamp": now,
+            },
+            "bank_name": row.bank_name,
+            "account_number": row.account_number[-4:],  # Only store last 4 digits for security
+            "routing_number": row.routing_number[-4:] or None,
+            "investment_amount": whole_number(row.investment_amount),
+            "funds_status": "verified" if row.bank_valid else "pending",
+            "funds_verification": {"valid": bool(row.bank_valid), "checks": bank_checks(values), "timestamp": now},
+            "onboarding": "bulk",
+        }
+        complete = row.accredited and row.aml_passed and row.bank_valid
+        investor["status"] = "complete" if complete else "incomplete"
+        if complete:
+            investor["completion_date"] = now
+        investors.append(investor)
+
+    investor_ids = pd.Series(None, index=chunk.index, dtype=object)
+    investor_ids[accepted] = [investor["id"] for investor in investors]
+    report = pd.DataFrame({
+        "line": chunk.index,
+        "outcome": np.where(~accepted, "rejected", np.where(review == "", "imported", "needs review")),
+        "investor_id": investor_ids,
+        "issues": errors.where(~accepted, review),
+    })
+    return investors, report
@@ -0,0 +1,125 @@
+"""Identity document number validation, for one ID or a whole column.
+
+Each supported ID type has a precompiled pattern and optionally a checksum.
+validate_id checks a single number (the KYC form), validate_ids checks a
+pandas Series of numbers with str methods and NumPy, for bulk imports.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+# Verhoeff check digit tables: multiplication in the dihedral group D5 and
+# the position-dependent permutation applied to each digit
+VERHOEFF_MULTIPLY = np.array([
+    [0, 1, 2, 3, 4, 5, 6, 7, 8, 9],
+    [1, 2, 3, 4, 0, 6, 7, 8, 9, 5],
+    [2, 3, 4, 0, 1, 7, 8, 9, 5, 6],
+    [3, 4, 0, 1, 2, 8, 9, 5, 6, 7],
+    [4, 0, 1, 2, 3, 9, 5, 6, 7, 8],
+    [5, 9, 8, 7, 6, 0, 4, 3, 2, 1],
+    [6, 5, 9, 8, 7, 1, 0, 4, 3, 2],
+    [7, 6, 5, 9, 8, 2, 1, 0, 4, 3],
+    [8, 7, 6, 5, 9, 3, 2, 1, 0, 4],
+    [9, 8, 7, 6, 5, 4, 3, 2, 1, 0],
+])
+VERHOEFF_PERMUTE = np.array([
+    [0, 1, 2, 3, 4, 5, 6, 7, 8, 9],
+    [1, 5, 7, 6, 2, 8, 3, 0, 9, 4],
+    [5, 8, 0, 3, 7, 9, 6, 1, 4, 2],
+    [8, 9, 1, 6, 0, 4, 3, 7, 2, 5],
+    [9, 4, 5, 3, 1, 2, 6, 8, 7, 0],
+    [4, 2, 8, 6, 5, 7, 3, 9, 0, 1],
+    [2, 7, 9, 3, 8, 0, 6, 4, 1, 5],
+    [7, 0, 4, 6, 9, 1, 3, 2, 5, 8],
+])
+
+
+def verhoeff_valid(number):
+    """Whether a string of digits ends in a correct Verhoeff check digit"""
+    check = 0
+    for position, digit in enumerate(reversed(number)):
+        check = VERHOEFF_MULTIPLY[check, VERHOEFF_PERMUTE[position % 8, int(digit)]]
+    return check == 0
+
+
+def verhoeff_valid_many(numbers, length):
+    """verhoeff_valid for a Series of digit strings that are all `length` long"""
+    digits = np.frombuffer(numbers.to_numpy(dtype=f"S{length}").tobytes(), dtype=np.uint8)
+    digits = digits.reshape(-1, length)[:, ::-1] - ord("0")
+    check = np.zeros(len(digits), dtype=np.intp)
+    for position in range(length):
+        check = VERHOEFF_MULTIPLY[check, VERHOEFF_PERMUTE[position % 8, digits[:, position]]]
+    return check == 0
+
+
+class IDRule:
+    """How one ID type is checked: a full-match pattern, then an optional checksum"""
+
+    def __init__(self, label, pattern, checksum=None, checksum_many=None):
+        self.label = label
+        self.pattern = re.compile(pattern)
+        self.checksum = checksum
+        self.checksum_many = checksum_many
+
+
+ID_RULES = {
+    # 12 digits, never starting with 0 or 1, the last a Verhoeff check digit
+    "Aadhar Card (India)": IDRule(
+        "Aadhar", r"[2-9]\d{11}",
+        checksum=verhoeff_valid,
+        checksum_many=lambda numbers: verhoeff_valid_many(numbers, 12),
+    ),
+    # AAAPL1234C: three letters, the holder type (Person, Company, HUF, Firm,
+    # AOP, Trust, BOI, Local authority, Juridical person, Government), the
+    # initial of the surname or name, four digits and an alphabetic check
+    "PAN Card (India)": IDRule("PAN", r"[A-Z]{3}[PCHFATBLJG][A-Z]\d{4}[A-Z]"),
+    # Basic passport format check (varies by country)
+    "Passport": IDRule("Passport", r"[A-Z0-9]{8,12}"),
+}
+
+NO_CHECK_MESSAGE = "Format check not available for this ID type"
+
+
+def validate_id(id_number, id_type):
+    """Validate one ID number; returns (valid, message)"""
+    rule = ID_RULES.get(id_type)
+    if rule is None:
+        return True, NO_CHECK_MESSAGE
+    id_number = id_number.strip()
+    if not rule.pattern.fullmatch(id_number):
+        return False, f"Invalid {rule.label} format"
+    if rule.checksum and not rule.checksum(id_number):
+        return False, f"Invalid {rule.label} checksum"
+    return True, f"Valid {rule.label} format"
+
+
+def validate_ids(id_numbers, id_types):
+    """Validate a Series of ID numbers against a Series (or one) of ID types.
+
+    Returns a DataFrame on the same index with a boolean "valid" column and
+    the "message" validate_id would give for each row. Missing numbers are
+    invalid for every ID type that has a rule.
+    """
+    id_numbers = id_numbers.astype("string").str.strip()
+    if not isinstance(id_types, pd.Series):
+        id_types = pd.Series(id_types, index=id_numbers.index)
+
+    valid = pd.Series(True, index=id_numbers.index)
+    message = pd.Series(NO_CHECK_MESSAGE, index=id_numbers.index, dtype=object)
+    for id_type, rule in ID_RULES.items():
+        rows = (id_types == id_type).to_numpy()
+        if not rows.any():
+            continue
+        numbers = id_numbers[rows]
+        formatted = numbers.str.fullmatch(rule.pattern).fillna(False).to_numpy(dtype=bool)
+        passed = formatted.copy()
+        if rule.checksum_many and formatted.any():
+            passed[formatted] = rule.checksum_many(numbers[formatted])
+        valid[rows] = passed
+        message[rows] = np.where(
+            passed,
+            f"Valid {rule.label} format",
+            np.where(formatted, f"Invalid {rule.label} checksum", f"Invalid {rule.label} format"),
+        )
+    return pd.DataFrame({"valid": valid, "message": message})
@@ -0,0 +1,52 @@
+"""Chunked CSV and Parquet export of investors from an InvestorStore.
+
+Batches are read from the store and appended to a temporary file one at a
+time, so only one batch of rows is ever held as Python objects; the
+finished file is the only full copy, read back once for st.download_button.
+"""
+import csv
+import io
+import tempfile
+
+from investor_store import COLUMNS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is offered only when pyarrow is installed
+    pa = pq = None
+
+
+def write_csv(batches, out):
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+    writer = csv.DictWriter(text, fieldnames=COLUMNS)
+    writer.writeheader()
+    for batch in batches:
+        writer.writerows(batch)
+    text.flush()
+    text.detach()
+
+
+def write_parquet(batches, out):
+    schema = pa.schema([
+        (column, pa.float64() if column == "investment_amount" else pa.string()) for column in COLUMNS
+    ])
+    with pq.ParquetWriter(out, schema, compression="zstd") as writer:
+        for batch in batches:
+            # One row group per batch
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+
+
+# Label -> (writer, file extension, MIME type)
+EXPORT_FORMATS = {"CSV": (write_csv, "csv", "text/csv")}
+if pa is not None:
+    EXPORT_FORMATS["Parquet"] = (write_parquet, "parquet", "application/vnd.apache.parquet")
+
+
+def export_investors(store, file_format, filters=None, batch_size=5000):
+    """Return the matching investors as the bytes of a file_format file"""
+    writer = EXPORT_FORMATS[file_format][0]
+    with tempfile.TemporaryFile() as out:
+        writer(store.iter_batches(filters, batch_size), out)
+        out.seek(0)
+        return out.read()
@@ -0,0 +1,224 @@
+"""Persistent storage for completed investor verifications.
+
+The app talks to an InvestorStore, so the backend can be swapped without
+touching the pages. SQLite is the default: one file, no server, and indexed
+columns for the fields the dashboard filters on. The full investor record
+is kept alongside as JSON.
+"""
+import json
+import sqlite3
+import threading
+from urllib.parse import urlparse
+
+# Investor fields copied into their own columns; everything is also in `data`
+COLUMNS = [
+    "id",
+    "status",
+    "first_name",
+    "last_name",
+    "country",
+    "kyc_status",
+    "accreditation_status",
+    "aml_status",
+    "funds_status",
+    "investment_amount",
+    "completion_date",
+]
+
+# Columns the dashboard may sort on
+SORTABLE_COLUMNS = ("completion_date", "last_name", "country", "investment_amount", "accreditation_status", "aml_status")
+# Filter keys that match a column against one value or a list of values
+VALUE_FILTERS = ("country", "status", "kyc_status", "accreditation_status", "aml_status", "funds_status")
+
+
+def _json_default(value):
+    # numpy scalars (e.g. the AML risk score) and anything else JSON can't encode
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+class InvestorStore:
+    """Interface every investor store implements"""
+
+    def save(self, investor):
+        """Insert or replace an investor record, keyed on its id"""
+        raise NotImplementedError
+
+    def save_many(self, investors):
+        """save for a batch of investor records, written together"""
+        raise NotImplementedError
+
+    def get(self, investor_id):
+        """Return the investor record with this id, or None"""
+        raise NotImplementedError
+
+    def count(self, filters=None):
+        """Number of investors matching the filters (see page)"""
+        raise NotImplementedError
+
+    def page(self, filters=None, sort_by="completion_date", descending=True, limit=50, offset=0):
+        """One page of matching investors, as dicts of the COLUMNS values.
+
+        filters may hold any VALUE_FILTERS key (a value or a list of values)
+        and "name" (a case-insensitive substring of the full name).
+        """
+        raise NotImplementedError
+
+    def stats(self):
+        """Dashboard totals over completed investors (status "complete"):
+        investors, accredited, total_investment, aml_flagged"""
+        raise NotImplementedError
+
+    def countries(self):
+        """Distinct countries, sorted"""
+        raise NotImplementedError
+
+    def iter_batches(self, filters=None, batch_size=1000):
+        """Yield the matching investors as lists of COLUMNS dicts, in insertion order"""
+        raise NotImplementedError
+
+
+class SQLiteInvestorStore(InvestorStore):
+    """Investor store backed by a SQLite database file.
+
+    One connection is shared by every Streamlit session in the process and
+    guarded by a lock. WAL mode lets other processes read while one writes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS investors (
+                    id TEXT PRIMARY KEY,
+                    status TEXT,
+                    first_name TEXT,
+                    last_name TEXT,
+                    country TEXT,
+                    kyc_status TEXT,
+                    accreditation_status TEXT,
+                    aml_status TEXT,
+                    funds_status TEXT,
+                    investment_amount REAL NOT NULL DEFAULT 0,
+                    completion_date TEXT,
+                    data TEXT NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS investors_status ON investors (status)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS investors_country ON investors (country)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS investors_completion_date ON investors (completion_date)")
+
+    def _row(self, investor):
+        values = [investor.get(column) for column in COLUMNS]
+        values[COLUMNS.index("investment_amount")] = investor.get("investment_amount") or 0
+        return values + [json.dumps(investor, default=_json_default)]
+
+    def save(self, investor):
+        self.save_many([investor])
+
+    def save_many(self, investors):
+        placeholders = ", ".join("?" * (len(COLUMNS) + 1))
+        rows = [self._row(investor) for investor in investors]
+        # One transaction per batch rather than per investor
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO investors ({', '.join(COLUMNS)}, data) VALUES ({placeholders})",
+                rows,
+            )
+
+    def get(self, investor_id):
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM investors WHERE id = ?", (investor_id,)).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    @staticmethod
+    def _where(filters):
+        clauses, params = [], []
+        for key in VALUE_FILTERS:
+            value = (filters or {}).get(key)
+            if value is None or value == []:
+                continue
+            values = value if isinstance(value, (list, tuple)) else [value]
+            clauses.append(f"{key} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        filters = filters or {}
+        if filters.get("name"):
+            clauses.append("(first_name || ' ' || last_name) LIKE ?")
+            params.append(f"%{filters['name']}%")
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def count(self, filters=None):
+        where, params = self._where(filters)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM investors{where}", params).fetchone()[0]
+
+    def page(self, filters=None, sort_by="completion_date", descending=True, limit=50, offset=0):
+        if sort_by not in SORTABLE_COLUMNS:
+            raise ValueError(f"Cannot sort on {sort_by!r}")
+        where, params = self._where(filters)
+        direction = "DESC" if descending else "ASC"
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM investors{where} "
+                f"ORDER BY {sort_by} {direction}, id {direction} LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def stats(self):
+        # Every total in one pass over the completed investors; bulk-imported
+        # rows awaiting review are kept out until they are complete
+        with self._lock:
+            row = self._conn.execute("""
+                SELECT COUNT(*) AS investors,
+                       COALESCE(SUM(accreditation_status = 'verified'), 0) AS accredited,
+                       COALESCE(SUM(investment_amount), 0) AS total_investment,
+                       COALESCE(SUM(aml_status = 'flagged'), 0) AS aml_flagged
+                FROM investors
+                WHERE status = 'complete'
+            """).fetchone()
+        return dict(row)
+
+    def countries(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT country FROM investors WHERE country IS NOT NULL ORDER BY country"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def iter_batches(self, filters=None, batch_size=1000):
+        # Keyset on rowid with indexes disabled, so each batch resumes a single
+        # table scan instead of re-sorting every remaining match
+        where, params = self._where(filters)
+        where += " AND rowid > ?" if where else " WHERE rowid > ?"
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT rowid, {', '.join(COLUMNS)} FROM investors NOT INDEXED{where} ORDER BY rowid LIMIT ?",
+                    params + [last_rowid, batch_size],
+                ).fetchall()
+            if not rows:
+                return
+            yield [{column: row[column] for column in COLUMNS} for row in rows]
+            last_rowid = rows[-1]["rowid"]
+
+# URL schemes open_store understands; register other backends here
+STORE_BACKENDS = {
+    # sqlite:///rel.db -> "rel.db", sqlite:////abs.db -> "/abs.db", sqlite:// -> in memory
+    "sqlite": lambda url: SQLiteInvestorStore(url.path[1:] or ":memory:"),
+}
+
+
+def open_store(url):
+    """Open the investor store a URL such as sqlite:///investors.db points to"""
+    parsed = urlparse(url)
+    if parsed.scheme not in STORE_BACKENDS:
+        raise ValueError(f"Unsupported investor store {url!r}; expected one of {sorted(STORE_BACKENDS)}")
+    return STORE_BACKENDS[parsed.scheme](parsed)
@@ -0,0 +1,146 @@
+"""Accreditation, AML and bank detail rules, for one investor or whole columns.
+
+Each rule has a scalar function, which app.py's verification pages call
+for a single investor, and a column-wise *_many version that bulk
+onboarding runs over a chunk. Both read the thresholds and patterns
+below. The *_reasons, *_factors and *_checks helpers turn a mapping of
+inputs and results into the messages shown to the investor.
+"""
+import random
+import re
+
+import numpy as np
+import pandas as pd
+
+HIGH_RISK_NAMES = ["John Doe", "Jane Smith", "Vladimir Putin", "Kim Jong Un"]
+HIGH_RISK_COUNTRIES = ["North Korea", "Iran", "Syria"]
+# A name is flagged when it is a substring of a high-risk name
+HIGH_RISK_NAME_FRAGMENTS = frozenset(
+    name.lower()[start:end]
+    for name in HIGH_RISK_NAMES
+    for start in range(len(name))
+    for end in range(start, len(name) + 1)
+)
+# Each name or jurisdiction match adds RISK_PER_MATCH to the risk score;
+# screening fails from AML_FAIL_SCORE up
+RISK_PER_MATCH = 33
+AML_FAIL_SCORE = 50
+
+# Accreditation (simplified; real rules are stricter)
+MIN_ANNUAL_INCOME = 200000
+MIN_NET_WORTH = 1000000
+MIN_EXPERIENCE_YEARS = 5
+# Financial backing an experienced investor needs: either one
+EXPERIENCED_MIN_INCOME = 100000
+EXPERIENCED_MIN_NET_WORTH = 500000
+
+ACCOUNT_NUMBER_PATTERN = r"\d{10,17}"
+ROUTING_NUMBER_PATTERN = r"\d{9}"
+
+
+def check_accreditation(income, net_worth, experience):
+    """Which accreditation criteria one investor meets"""
+    result = {
+        "by_income": income >= MIN_ANNUAL_INCOME,
+        "by_net_worth": net_worth >= MIN_NET_WORTH,
+        "by_experience": experience >= MIN_EXPERIENCE_YEARS
+        and (income >= EXPERIENCED_MIN_INCOME or net_worth >= EXPERIENCED_MIN_NET_WORTH),
+    }
+    result["accredited"] = any(result.values())
+    return result
+
+
+def verify_accreditation_many(income, net_worth, experience):
+    """check_accreditation for Series of inputs, as a DataFrame of its results"""
+    result = pd.DataFrame({
+        "by_income": income >= MIN_ANNUAL_INCOME,
+        "by_net_worth": net_worth >= MIN_NET_WORTH,
+        "by_experience": (experience >= MIN_EXPERIENCE_YEARS)
+        & ((income >= EXPERIENCED_MIN_INCOME) | (net_worth >= EXPERIENCED_MIN_NET_WORTH)),
+    })
+    result["accredited"] = result.any(axis=1)
+    return result
+
+
+def screen_aml(first_name, last_name, country):
+    """Mock AML screening: sanctions-name and jurisdiction matches and a risk score"""
+    result = {
+        "name_match": f"{first_name} {last_name}".lower() in HIGH_RISK_NAME_FRAGMENTS,
+        "country_risk": country in HIGH_RISK_COUNTRIES,
+    }
+    risks = result["name_match"] + result["country_risk"]
+    result["risk_score"] = risks * RISK_PER_MATCH if risks else random.randint(5, 19)
+    result["passed"] = result["risk_score"] < AML_FAIL_SCORE
+    return result
+
+
+def aml_check_many(first_names, last_names, countries, rng=None):
+    """screen_aml for Series of inputs, as a DataFrame of its results"""
+    rng = rng or np.random.default_rng()
+    names = (first_names + " " + last_names).str.lower()
+    result = pd.DataFrame({
+        "name_match": names.isin(HIGH_RISK_NAME_FRAGMENTS),
+        "country_risk": countries.isin(HIGH_RISK_COUNTRIES),
+    })
+    risks = result["name_match"].astype(int) + result["country_risk"].astype(int)
+    result["risk_score"] = np.where(risks > 0, risks * RISK_PER_MATCH, rng.integers(5, 20, len(result)))
+    result["passed"] = result["risk_score"] < AML_FAIL_SCORE
+    return result
+
+
+def check_bank_details(account_number, routing_number, bank_name):
+    """Bank detail format checks; an empty routing number is allowed"""
+    result = {
+        "account_valid": re.fullmatch(ACCOUNT_NUMBER_PATTERN, account_number) is not None,
+        "routing_valid": not routing_number or re.fullmatch(ROUTING_NUMBER_PATTERN, routing_number) is not None,
+    }
+    result["valid"] = result["account_valid"] and result["routing_valid"] and bool(bank_name)
+    return result
+
+
+def validate_bank_details_many(account_numbers, routing_numbers, bank_names):
+    """check_bank_details for Series of inputs ("" when missing), as a DataFrame"""
+    result = pd.DataFrame({
+        "account_valid": account_numbers.str.fullmatch(ACCOUNT_NUMBER_PATTERN),
+        "routing_valid": (routing_numbers == "") | routing_numbers.str.fullmatch(ROUTING_NUMBER_PATTERN),
+    })
+    result["valid"] = result["account_valid"] & result["routing_valid"] & (bank_names != "")
+    return result
+
+
+def whole_number(value):
+    """Amounts read as floats, back to int when they are whole (for messages and records)"""
+    return int(value) if float(value).is_integer() else float(value)
+
+
+def accreditation_reasons(row):
+    """The reasons shown for a mapping of accreditation inputs and check_accreditation results"""
+    reasons = []
+    if row["by_income"]:
+        reasons.append(f"Annual income of ${whole_number(row['annual_income']):,} meets minimum requirement")
+    if row["by_net_worth"]:
+        reasons.append(f"Net worth of ${whole_number(row['net_worth']):,} meets minimum requirement")
+    if row["by_experience"]:
+        reasons.append(f"{whole_number(row['investment_experience'])} years of investment experience with sufficient financial backing")
+    return reasons or ["Does not meet any accreditation criteria"]
+
+
+def aml_risk_factors(row):
+    """The risk factors shown for a mapping of screen_aml inputs and results"""
+    risks = []
+    if row["name_match"]:
+        risks.append("Potential match on PEP/Sanctions list")
+    if row["country_risk"]:
+        risks.append(f"High-risk jurisdiction: {row['country']}")
+    return risks or ["No significant risk factors identified"]
+
+
+def bank_checks(row):
+    """The checks shown for a mapping of check_bank_details inputs and results"""
+    checks = [
+        "Account number format is valid" if row["account_valid"] else "Account number format is invalid",
+        "Routing number format is valid" if row["routing_valid"] else "Routing number format is invalid",
+    ]
+    if row["bank_name"]:
+        checks.append(f"Bank name provided: {row['bank_name']}")
+    return checks